@@ -0,0 +1,79 @@
+import os
+import threading
+
+from flask import Blueprint, request, jsonify
+from flask_pymongo import PyMongo
+
+from api_core import add_health_check
+from auth import UserStore, RevocationStore, AuthError, StoreUnavailable, token_cache, bearer_token, login_required
+
+bp = Blueprint("auth", __name__)
+
+# MongoDB configuration
+MONGO_URI = os.environ.get("MONGO_URI", "Mongo_URL")
+
+# Set when the blueprint is registered on the app
+users = None
+
+@bp.record_once
+def connect(state):
+    global users
+    app = state.app
+    app.config.setdefault("MONGO_URI", MONGO_URI)
+    mongo = PyMongo(app)
+    users = UserStore(mongo.db.users)  # Reference to the users collection
+    # Logouts are recorded in Mongo so every worker rejects the revoked token
+    token_cache.revocations = RevocationStore(mongo.db.revoked_tokens)
+
+    def ensure_indexes():
+        users.ensure_indexes()
+        token_cache.revocations.ensure_indexes()
+
+    # Unique email index, created off the startup path; signup retries it if the database is not reachable yet
+    threading.Thread(target=ensure_indexes, name="users-indexes", daemon=True).start()
+
+    def database():
+        # Check if MongoDB is connected
+        mongo.db.command('ping')
+        return "connected"
+    add_health_check(app, "database", database)
+
+# Signup API
+@bp.route("/signup", methods=["POST"])
+def signup():
+    data = request.get_json(silent=True)
+    data = data if isinstance(data, dict) else {}
+    fields = ("name", "email", "restaurant_name", "password")
+    if not all(k in data for k in fields):
+        return jsonify({"error": "Missing required fields"}), 400
+    if not all(isinstance(data[k], str) for k in fields):
+        return jsonify({"error": "name, email, restaurant_name and password must be strings"}), 400
+
+    # The unique email index rejects duplicates, including concurrent signups
+    try:
+        users.create(data)
+    except AuthError as e:
+        return jsonify({"error": str(e)}), 400
+    except StoreUnavailable as e:
+        return jsonify({"error": str(e)}), 503
+    return jsonify({"message": "User registered successfully"}), 201
+
+# Login API
+@bp.route("/login", methods=["POST"])
+def login():
+    data = request.get_json(silent=True) or {}
+    user = users.authenticate(data.get("email"), data.get("password"))
+
+    if user:
+        return jsonify({"message": "Login successful", "user": user, "token": token_cache.issue(user)}), 200
+    return jsonify({"error": "Invalid email or password"}), 401
+
+# Logout API
+@bp.route("/logout", methods=["POST"])
+@login_required
+def logout():
+    try:
+        token_cache.revoke(bearer_token(request.headers.get("Authorization")))
+    except StoreUnavailable as e:
+        return jsonify({"error": str(e)}), 503
+    return jsonify({"message": "Logged out"}), 200
@@ -0,0 +1,172 @@
+import json
+import time
+
+from flask import Blueprint, request, jsonify, Response, current_app
+
+from auth import login_required, token_cache, bearer_token, AuthError
+from jobs import job_manager
+from llm_cache import llm_cache
+from metrics import metrics, start_trace, current_trace, REQUEST_SECONDS, SERVER_TIMING_ALWAYS, SERVER_TIMING_HEADER
+
+# Routes every process serves, whatever subsystems it runs: health, metrics, jobs and the LLM cache
+bp = Blueprint("core", __name__)
+
+# Comment line sent on idle job event streams so proxies keep them open
+SSE_KEEPALIVE_SECONDS = 15
+
+
+def add_health_check(app, name, check):
+    # check() -> JSON-serializable status for /api/health; raising marks the process unhealthy
+    app.extensions.setdefault("health_checks", {})[name] = check
+
+
+def job_accepted(job):
+    # Clients follow events_url for live progress or poll the job resource
+    return jsonify({**job.to_dict(include_result=False), "events_url": f"/api/jobs/{job.id}/events"}), 202
+
+def wants_async():
+    # Callers opt into job-id responses with ?async=true or {"async": true}
+    if request.args.get("async", "false").lower() == "true":
+        return True
+    data = request.get_json(silent=True) or {}
+    return bool(data.get("async"))
+
+def authenticated():
+    try:
+        token_cache.verify(bearer_token(request.headers.get("Authorization")))
+        return True
+    except AuthError:
+        return False
+
+def visible_job(job_id):
+    # Jobs of private workflows (e.g. sales ingestion) carry their input; only signed-in callers see them
+    job = job_manager.get(job_id)
+    if job is None or (job_manager.is_private(job) and not authenticated()):
+        return None
+    return job
+
+@bp.before_app_request
+def start_request_trace():
+    # Stage timings of this request, and of the jobs it waits on, collect on this trace
+    start_trace()
+
+@bp.after_app_request
+def record_request_metrics(response):
+    trace = current_trace()
+    if trace is None:
+        return response
+    endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    REQUEST_SECONDS.observe(
+        time.perf_counter() - trace.started, method=request.method, endpoint=endpoint, status=response.status_code
+    )
+    # Opt-in per-request breakdown, e.g. "X-Server-Timing: true" or ?timing=true
+    requested = (
+        request.headers.get(SERVER_TIMING_HEADER, "").lower() in ("1", "true") or request.args.get("timing") == "true"
+    )
+    if SERVER_TIMING_ALWAYS or requested:
+        response.headers["Server-Timing"] = trace.server_timing()
+    return response
+
+@bp.route('/metrics')
+def prometheus_metrics():
+    # Prometheus scrape endpoint: stage latencies, request latencies, cache hits and model fits
+    return Response(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+# Health check endpoint
+@bp.route("/api/health", methods=["GET"])
+def health_check():
+    # Each enabled subsystem reports its dependencies, e.g. the database or the detector
+    status = {"subsystems": current_app.config["ENABLED_SUBSYSTEMS"]}
+    try:
+        for name, check in current_app.extensions.get("health_checks", {}).items():
+            status[name] = check()
+        return jsonify({"status": "healthy", **status}), 200
+    except Exception as e:
+        return jsonify({"status": "unhealthy", "error": str(e), **status}), 500
+
+@bp.route("/api/admin/llm_cache", methods=["GET"])
+@login_required
+def llm_cache_stats():
+    try:
+        return jsonify(llm_cache.stats()), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route("/api/admin/llm_cache", methods=["DELETE"])
+@login_required
+def clear_llm_cache():
+    try:
+        return jsonify({"removed": llm_cache.clear()}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Workflow job APIs
+@bp.route('/api/jobs', methods=['POST'])
+def submit_job():
+    try:
+        data = request.get_json() or {}
+        workflow = data.get('workflow')
+        if workflow not in job_manager.workflows:
+            return jsonify({"error": f"workflow must be one of {job_manager.workflows}"}), 400
+
+        try:
+            job = job_manager.submit(workflow, data.get('params', {}))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        return job_accepted(job)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    show_private = authenticated()
+    jobs = [job for job in job_manager.list() if show_private or not job_manager.is_private(job)]
+    return jsonify({"jobs": [job.to_dict(include_result=False) for job in jobs]})
+
+@bp.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = visible_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict())
+
+@bp.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    if visible_job(job_id) is None:
+        return jsonify({"error": "Job not found"}), 404
+    job = job_manager.cancel(job_id)
+    return jsonify(job.to_dict(include_result=False))
+
+@bp.route('/api/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    job = visible_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    # Reconnecting EventSource clients resume after the last id they saw
+    try:
+        next_id = int(request.headers.get('Last-Event-ID', -1)) + 1
+    except ValueError:
+        next_id = 0
+
+    def generate():
+        nonlocal next_id
+        while True:
+            # Blocks on the job's condition; the timeout only paces keep-alive comments
+            events = job.events_since(next_id, timeout=SSE_KEEPALIVE_SECONDS)
+            if not events:
+                if job.done.is_set():
+                    return
+                yield ": keep-alive\n\n"
+                continue
+            for event in events:
+                yield f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event)}\n\n"
+                next_id = event['id'] + 1
+                if event['event'] == 'done':
+                    return
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
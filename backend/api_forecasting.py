@@ -0,0 +1,278 @@
+import numpy as np
+import pandas as pd
+from flask import Blueprint, request, jsonify
+
+from api_core import job_accepted, wants_async
+from auth import login_required
+from boosted_model import get_boosted_model, blend_forecasts, FORECAST_BLEND_WEIGHT
+from consumption_history import same_day_by_year
+from fast_forecast import get_fast_model
+from forecast_scheduler import forecast_scheduler, FORECAST_SCHEDULER
+from forecasting import parse_forecast_dates, parse_forecast_engine, parse_blend_weight, parse_compare_years
+from jobs import job_manager
+from metrics import stage
+from model_registry import registry, DATASETS
+from recipes import recipe_matrix
+from sales_ingest import prepare_rows, IngestError, DAILY_DATASETS
+
+bp = Blueprint("forecasting", __name__)
+
+# Dataset the per-item forecast models are fitted on
+FORECAST_DATASET = DATASETS["realistic"]
+
+# Imported by the job worker on the first ingestion; private so only the
+# authenticated, validating /api/ingest_sales endpoint can submit it
+job_manager.register("ingest_sales", "sales_ingest:ingest_sales", public=False)
+
+@bp.record_once
+def start_scheduler(state):
+    # Precompute the upcoming forecast horizon in the background
+    if FORECAST_SCHEDULER:
+        forecast_scheduler.start()
+
+# Forecast model registry admin APIs
+@bp.route("/api/admin/models", methods=["GET"])
+@login_required
+def list_models():
+    try:
+        return jsonify({"models": registry.list_models()}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route("/api/admin/models/warm", methods=["POST"])
+@login_required
+def warm_models():
+    try:
+        data = request.get_json(silent=True) or {}
+        names = data.get("datasets", list(DATASETS))
+        unknown = [name for name in names if name not in DATASETS]
+        if unknown:
+            return jsonify({"error": f"Unknown datasets: {unknown}"}), 400
+
+        warmed = [registry.warm(DATASETS[name]) for name in names]
+        # Rebuild the materialized forecast horizon against the warmed models
+        forecast_scheduler.notify()
+        return jsonify({"warmed": warmed}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route("/api/admin/models", methods=["DELETE"])
+@login_required
+def evict_models():
+    try:
+        dataset = request.args.get("dataset")
+        item = request.args.get("item")
+        stale_only = request.args.get("stale_only", "false").lower() == "true"
+
+        removed = registry.evict(dataset=dataset, item=item, stale_only=stale_only)
+        return jsonify({"removed": removed}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route("/api/admin/forecast_table", methods=["GET"])
+@login_required
+def forecast_table_status():
+    try:
+        return jsonify(forecast_scheduler.status()), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route("/api/admin/forecast_table/refresh", methods=["POST"])
+@login_required
+def refresh_forecast_table():
+    try:
+        rebuilt = forecast_scheduler.refresh(force=True)
+        return jsonify({"rebuilt": rebuilt, **forecast_scheduler.status()}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route("/api/admin/boosted_model", methods=["GET"])
+@login_required
+def boosted_model_status():
+    try:
+        # Trains on first use, then reports backend, history end and holdout accuracy
+        return jsonify(get_boosted_model(FORECAST_DATASET).to_dict()), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def forecast_consumption(dates, engine, blend_weight=FORECAST_BLEND_WEIGHT):
+    # dates x ingredients consumption and failed items for the selected engine
+    if engine == "fast":
+        model = get_fast_model(FORECAST_DATASET)
+        return recipe_matrix.consumption_frame(model.predict_item_sales(dates)), model.failed_items
+
+    # Read from the materialized horizon table; other dates are computed on demand
+    consumption, failed_items = forecast_scheduler.consumption(dates)
+    if engine == "blend":
+        # Short-term boosted predictions where available, Prophet alone further out
+        short_term = recipe_matrix.consumption_frame(get_boosted_model(FORECAST_DATASET).predict_item_sales(dates))
+        consumption = blend_forecasts(consumption, short_term, blend_weight)
+    return consumption, failed_items
+
+@bp.route('/api/generate_forecast', methods=['POST'])
+def generate_forecast():
+    try:
+        data = request.get_json()
+        custom_date = data.get('date')  # Expected format: "YYYY-MM-DD"
+
+        if not custom_date:
+            return jsonify({"error": "Date is required in YYYY-MM-DD format"}), 400
+
+        try:
+            engine = parse_forecast_engine(data)
+            blend_weight = parse_blend_weight(data, FORECAST_BLEND_WEIGHT)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        # Convert date string to datetime
+        target_date = pd.to_datetime(custom_date)
+
+        with stage("forecast"):
+            consumption, failed_items = forecast_consumption([target_date], engine, blend_weight)
+        consumption = consumption.iloc[0]
+
+        # Convert ingredient totals to integers (rounded)
+        ingredient_totals = {k: int(np.round(v)) for k, v in consumption.items()}
+
+        # Create response JSON
+        response = {
+            "target_date": custom_date,
+            "predicted_ingredient_consumption": ingredient_totals,
+            "failed_items": failed_items
+        }
+
+        with stage("json_encode"):
+            return jsonify(response)
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/generate_forecast_batch', methods=['POST'])
+def generate_forecast_batch():
+    try:
+        data = request.get_json() or {}
+
+        try:
+            dates = parse_forecast_dates(data)
+            engine = parse_forecast_engine(data)
+            blend_weight = parse_blend_weight(data, FORECAST_BLEND_WEIGHT)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        # dates x ingredients consumption, one call for the whole range
+        with stage("forecast"):
+            consumption, failed_items = forecast_consumption(dates, engine, blend_weight)
+        consumption = consumption.round().astype(int)
+
+        date_labels = [d.strftime('%Y-%m-%d') for d in consumption.index]
+        ingredients = list(consumption.columns)
+
+        # Create response JSON
+        response = {
+            "dates": date_labels,
+            "ingredients": ingredients,
+            "consumption_matrix": consumption.to_numpy().tolist(),
+            "predicted_ingredient_consumption": {
+                label: dict(zip(ingredients, row)) for label, row in zip(date_labels, consumption.to_numpy().tolist())
+            },
+            "total_ingredient_consumption": {k: int(v) for k, v in consumption.sum().items()},
+            "failed_items": failed_items
+        }
+
+        with stage("json_encode"):
+            return jsonify(response)
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/compare_years', methods=['POST'])
+def compare_years():
+    try:
+        data = request.get_json()
+        custom_date = data.get('date')  # Expected format: "YYYY-MM-DD"
+        selected_years = data.get('years', [])  # List of years to compare, or "all"
+
+        if not custom_date or not selected_years:
+            return jsonify({"error": "Date and at least one year are required"}), 400
+
+        try:
+            years = parse_compare_years(data)
+            engine = parse_forecast_engine(data)
+            blend_weight = parse_blend_weight(data, FORECAST_BLEND_WEIGHT)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        # Convert date string to datetime
+        target_date = pd.to_datetime(custom_date)
+
+        # Calculate predicted consumption
+        with stage("forecast"):
+            consumption, failed_items = forecast_consumption([target_date], engine, blend_weight)
+        consumption = consumption.iloc[0]
+
+        # Convert ingredient totals to integers (rounded)
+        ingredient_totals = {k: int(np.round(v)) for k, v in consumption.items()}
+
+        # Same-day consumption per year, looked up in the precomputed daily table
+        with stage("historical_lookup"):
+            historical = same_day_by_year(FORECAST_DATASET, target_date, years)
+
+        historical_data = []
+        for year, row in historical.iterrows():
+            row = row.dropna()
+            historical_data.append({
+                "year": int(year),
+                "ingredient_consumption": {k: int(v) for k, v in row.items()}
+            })
+
+        # Create response JSON
+        response = {
+            "target_date": custom_date,
+            "historical_data": historical_data,
+            "predicted_ingredient_consumption": ingredient_totals,
+            "failed_items": failed_items
+        }
+
+        with stage("json_encode"):
+            return jsonify(response)
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/ingest_sales', methods=['POST'])
+@login_required
+def ingest_sales():
+    try:
+        data = request.get_json() or {}
+        rows = data.get('rows')
+        datasets = data.get('datasets', DAILY_DATASETS)
+        if not isinstance(datasets, list) or not all(isinstance(name, str) for name in datasets):
+            return jsonify({"error": "datasets must be a list of dataset names"}), 400
+
+        unknown = [name for name in datasets if name not in DAILY_DATASETS]
+        if unknown:
+            return jsonify({"error": f"Unknown datasets: {unknown}"}), 400
+
+        # Reject the whole batch up front if any row is invalid
+        try:
+            for name in datasets:
+                prepare_rows(DATASETS[name], rows)
+        except IngestError as e:
+            return jsonify({"error": str(e), "errors": e.errors}), 400
+
+        job = job_manager.submit("ingest_sales", {"rows": rows, "datasets": datasets})
+        if wants_async():
+            return job_accepted(job)
+
+        # Appending is quick; the wait covers refitting the affected items
+        timeout = 300
+        if not job_manager.wait(job, timeout):
+            return jsonify({"error": "Ingestion is still running", "job_id": job.id}), 504
+
+        if job.status != "succeeded":
+            return jsonify({"error": f"Ingestion failed: {job.error}", "job_id": job.id}), 500
+
+        return jsonify({"status": "success", "data": job.result, "job_id": job.id})
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -0,0 +1,46 @@
+from flask import Blueprint, jsonify
+
+from api_core import job_accepted, wants_async
+from jobs import job_manager
+
+bp = Blueprint("menu", __name__)
+
+# Menu generation runs on the job manager's worker pool, imported on its first job
+job_manager.register("menu", "workflow3.one:generate_menu")
+
+# Menu API
+@bp.route("/menu", methods=["GET"])
+def menu():
+    try:
+        job = job_manager.submit("menu")
+        if wants_async():
+            return job_accepted(job)
+
+        # Wait for the in-process job with timeout
+        timeout = 120  # 120 seconds timeout
+        if not job_manager.wait(job, timeout):
+            job_manager.cancel(job.id)
+            return jsonify({
+                "error": "Menu generation timed out",
+                "details": "The process took too long to complete",
+                "job_id": job.id
+            }), 500
+
+        if job.status != "succeeded":
+            return jsonify({
+                "error": "Failed to generate menu",
+                "details": job.error,
+                "job_id": job.id
+            }), 500
+
+        return jsonify({
+            "status": "success",
+            "data": job.result,
+            "job_id": job.id
+        })
+    except Exception as e:
+        return jsonify({
+            "error": "Internal server error",
+            "details": str(e),
+            "type": type(e).__name__
+        }), 500
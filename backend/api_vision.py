@@ -0,0 +1,345 @@
+import base64
+import json
+import logging
+import math
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Blueprint, request, jsonify, Response
+
+from api_core import add_health_check
+from detector import (
+    detector, DETECTOR_WARMUP, DETECTOR_IMGSZ,
+    count_items, annotate_image, decode_image
+)
+from detection_store import store, encode_image, IMAGE_FORMATS
+from metrics import stage
+from stream_counter import (
+    StreamCounter, count_video, stream_sessions, STREAM_SAMPLE_FPS, STREAM_IMGSZ, STREAM_MIN_HITS
+)
+
+logger = logging.getLogger(__name__)
+
+bp = Blueprint("vision", __name__)
+
+# Upload limits and decode threads for batch detection
+MAX_BATCH_IMAGES = 100
+DECODE_WORKERS = 8
+
+# Largest inference size accepted from a request; YOLO needs multiples of its 32px stride
+MAX_IMGSZ = 1280
+
+# Highest frame rate accepted for stream timestamps and sampling
+MAX_STREAM_FPS = 120
+
+# Frames accepted per frame-upload request in streaming detection
+MAX_STREAM_FRAMES = 300
+
+@bp.record_once
+def start_detector(state):
+    # Load and warm the YOLO detector off the request path
+    if DETECTOR_WARMUP and detector.available():
+        detector.warmup_async()
+    add_health_check(state.app, "detector", detector.status)
+
+def parse_imgsz(value):
+    try:
+        imgsz = int(value)
+    except (TypeError, ValueError):
+        imgsz = 0
+    if imgsz <= 0 or imgsz % 32 or imgsz > MAX_IMGSZ:
+        raise ValueError(f"imgsz must be a positive multiple of 32 up to {MAX_IMGSZ}")
+    if detector.fixed_imgsz and imgsz != detector.fixed_imgsz:
+        raise ValueError(f"imgsz must be {detector.fixed_imgsz} with the {detector.backend} detector backend")
+    return imgsz
+
+def annotation_options():
+    # Form fields controlling what comes back with the detections
+    fmt = request.form.get('format', 'jpg').lower()
+    if fmt not in IMAGE_FORMATS:
+        raise ValueError(f"format must be one of {sorted(IMAGE_FORMATS)}")
+    return {
+        "annotate": request.form.get('annotate', 'true').lower() == 'true',
+        "format": fmt,
+        "quality": int(request.form.get('quality', 90)),
+        "persist": request.form.get('persist', 'false').lower() == 'true',
+    }
+
+def annotation_payload(image, detections, options):
+    # Encoded in memory; written to the detection store only when asked to
+    if not options["annotate"]:
+        return {}
+    with stage("annotate"):
+        data = encode_image(annotate_image(image, detections), options["format"], options["quality"])
+    payload = {
+        "annotated_image": base64.b64encode(data).decode('utf-8'),
+        "annotated_image_type": IMAGE_FORMATS[options["format"]][1]
+    }
+    if options["persist"]:
+        payload["output_path"] = store.save(data, options["format"])
+    return payload
+
+@bp.route('/api/detect_and_classify', methods=['POST'])
+def detect_and_classify():
+    try:
+        if 'image' not in request.files:
+            return jsonify({"error": "No image file provided"}), 400
+        
+        file = request.files['image']
+        if file.filename == '':
+            return jsonify({"error": "No selected file"}), 400
+
+        try:
+            options = annotation_options()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        # Read the image
+        with stage("decode_image"):
+            image = decode_image(file.read())
+        
+        # The YOLO model is loaded once per process and shared across requests
+        if not detector.available():
+            return jsonify({"error": "YOLO model not found"}), 500
+        
+        # Perform detection
+        results = detector.predict(image)
+        
+        # Process results
+        detections = results[0]
+        item_counts = count_items(detections)
+        
+        return jsonify({
+            "status": "success",
+            "item_counts": item_counts,
+            "detections": detections,
+            **annotation_payload(image, detections, options)
+        })
+        
+    except Exception as e:
+        logger.exception("Error in detect_and_classify")
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/detect_and_classify_batch', methods=['POST'])
+def detect_and_classify_batch():
+    try:
+        files = [f for f in request.files.getlist('images') if f.filename != '']
+        if not files:
+            return jsonify({"error": "No image files provided"}), 400
+        if len(files) > MAX_BATCH_IMAGES:
+            return jsonify({"error": f"At most {MAX_BATCH_IMAGES} images per request"}), 400
+
+        try:
+            imgsz = parse_imgsz(request.form.get('imgsz', DETECTOR_IMGSZ))
+            options = annotation_options()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        # Batch scans default to counts and boxes only
+        options["annotate"] = request.form.get('annotate', 'false').lower() == 'true'
+
+        # The YOLO model is loaded once per process and shared across requests
+        if not detector.available():
+            return jsonify({"error": "YOLO model not found"}), 500
+
+        # Decode uploads concurrently; cv2 releases the GIL while decoding
+        payloads = [(f.filename, f.read()) for f in files]
+        with ThreadPoolExecutor(max_workers=min(len(payloads), DECODE_WORKERS)) as pool:
+            decoded = list(pool.map(lambda payload: _decode_upload(*payload), payloads))
+
+        images = [image for _, image, error in decoded if error is None]
+        results = iter(detector.predict_batch(images, imgsz=imgsz)) if images else iter([])
+
+        # Per-image results plus counts aggregated over the whole scan
+        item_counts = {}
+        per_image = []
+        for filename, image, error in decoded:
+            if error is not None:
+                per_image.append({"filename": filename, "error": error})
+                continue
+
+            detections = next(results)
+            per_image.append({
+                "filename": filename,
+                "item_counts": count_items(detections),
+                "detections": detections,
+                **annotation_payload(image, detections, options)
+            })
+            count_items(detections, item_counts)
+
+        return jsonify({
+            "status": "success",
+            "image_count": len(per_image),
+            "item_counts": item_counts,
+            "images": per_image
+        })
+
+    except Exception as e:
+        logger.exception("Error in detect_and_classify_batch")
+        return jsonify({"error": str(e)}), 500
+
+def parse_fps(value, name='fps'):
+    try:
+        fps = float(value)
+    except (TypeError, ValueError):
+        fps = math.nan
+    if not math.isfinite(fps) or fps <= 0 or fps > MAX_STREAM_FPS:
+        raise ValueError(f"{name} must be greater than 0 and at most {MAX_STREAM_FPS}")
+    return fps
+
+def parse_min_hits(value):
+    try:
+        min_hits = int(value)
+    except (TypeError, ValueError):
+        min_hits = 0
+    if isinstance(value, (bool, float)) or min_hits < 1:
+        raise ValueError("min_hits must be an integer of at least 1")
+    return min_hits
+
+def stream_params():
+    # Form fields or a JSON object; null values fall back to the defaults like missing ones
+    params = request.form if request.form else request.get_json(silent=True)
+    if not isinstance(params, dict):
+        params = {}
+    return {name: value for name, value in params.items() if value is not None}
+
+def stream_counter_options(realtime):
+    params = stream_params()
+    return StreamCounter(
+        sample_fps=parse_fps(params.get('sample_fps', STREAM_SAMPLE_FPS), 'sample_fps'),
+        imgsz=parse_imgsz(params.get('imgsz', detector.fixed_imgsz or STREAM_IMGSZ)),
+        min_hits=parse_min_hits(params.get('min_hits', STREAM_MIN_HITS if realtime else 1)),
+        realtime=realtime
+    )
+
+def ndjson_stream(events, finish):
+    # One JSON object per line so clients can render partial counts as they arrive
+    def generate():
+        try:
+            for event in events:
+                yield json.dumps(event) + "\n"
+            yield json.dumps(finish()) + "\n"
+        except Exception as e:
+            logger.exception("Error in detection stream")
+            yield json.dumps({"event": "error", "error": str(e)}) + "\n"
+    return Response(generate(), mimetype='application/x-ndjson')
+
+def uploaded_frames():
+    # Compressed uploads, read while the request's files are still open
+    files = [f for f in request.files.getlist('frames') if f.filename != '']
+    if len(files) > MAX_STREAM_FRAMES:
+        raise ValueError(f"At most {MAX_STREAM_FRAMES} frames per request")
+    return [(f.filename, f.read()) for f in files]
+
+def decoded_frames(uploads):
+    # Decoded as counting reaches each frame, so only one full image is held at a time;
+    # undecodable frames keep their slot on the timeline but are not scanned
+    for filename, data in uploads:
+        yield _decode_upload(filename, data)[1]
+
+@bp.route('/api/detect_stream', methods=['POST'])
+def detect_stream():
+    try:
+        if not detector.available():
+            return jsonify({"error": "YOLO model not found"}), 500
+
+        video = request.files.get('video')
+        if video is not None and video.filename != '':
+            try:
+                counter = stream_counter_options(realtime=True)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            # OpenCV reads videos from disk, so the upload is spooled to a temp file
+            suffix = os.path.splitext(video.filename)[1] or '.mp4'
+            fd, path = tempfile.mkstemp(suffix=suffix)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    shutil.copyfileobj(video.stream, f)
+            except Exception:
+                os.remove(path)
+                raise
+            response = ndjson_stream(count_video(path, counter), counter.summary)
+            # Runs when the response is closed, also if the client disconnects before the stream starts
+            response.call_on_close(lambda: os.remove(path))
+            return response
+
+        try:
+            frames = uploaded_frames()
+            # A fixed set of frames is scanned in full, only unchanged frames are skipped
+            counter = stream_counter_options(realtime=False)
+            fps = parse_fps(stream_params().get('fps', 1))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if not frames:
+            return jsonify({"error": "Provide a video file or frames"}), 400
+
+        def events():
+            for index, frame in enumerate(decoded_frames(frames)):
+                if frame is None:
+                    continue
+                event = counter.process(frame, index / fps, index)
+                if event is not None:
+                    yield event
+
+        return ndjson_stream(events(), counter.summary)
+
+    except Exception as e:
+        logger.exception("Error in detect_stream")
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/detect_stream/sessions', methods=['POST'])
+def create_stream_session():
+    try:
+        if not detector.available():
+            return jsonify({"error": "YOLO model not found"}), 500
+        # Live cameras push chunks of frames; tracks carry over between chunks
+        session = stream_sessions.create(parse_fps(stream_params().get('fps', 10)), stream_counter_options(realtime=True))
+        return jsonify(session.to_dict()), 201
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/detect_stream/sessions/<session_id>/frames', methods=['POST'])
+def push_stream_frames(session_id):
+    try:
+        session = stream_sessions.get(session_id)
+        if session is None:
+            return jsonify({"error": "Session not found"}), 404
+        try:
+            frames = uploaded_frames()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if not frames:
+            return jsonify({"error": "No frames provided"}), 400
+
+        def chunk_done():
+            return {"event": "chunk_done", **session.to_dict()}
+
+        return ndjson_stream(session.process_frames(decoded_frames(frames)), chunk_done)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/api/detect_stream/sessions/<session_id>', methods=['GET', 'DELETE'])
+def stream_session(session_id):
+    try:
+        if request.method == 'DELETE':
+            session = stream_sessions.close(session_id)
+        else:
+            session = stream_sessions.get(session_id)
+        if session is None:
+            return jsonify({"error": "Session not found"}), 404
+        return jsonify(session.to_dict()), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def _decode_upload(filename, data):
+    try:
+        return filename, decode_image(data), None
+    except Exception as e:
+        return filename, None, str(e)
+
+def allowed_file(filename):
+    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg'}
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -0,0 +1,94 @@
+from flask import Blueprint, request, jsonify
+
+from api_core import job_accepted, wants_async
+from jobs import job_manager
+from model_registry import DATASETS
+from waste_model import get_waste_model
+
+bp = Blueprint("waste", __name__)
+
+# Dataset the waste regressions are trained on
+WASTE_DATASET = DATASETS["final"]
+
+# Workflows run in-process on the job manager's worker pool, imported on their first job
+job_manager.register("waste", "workflow2.waste_prediction:predict_waste")
+job_manager.register("optimal_stock", "workflow2.stock:predict_optimal_stock")
+
+@bp.route('/api/predict_waste', methods=['POST'])
+def predict_waste():
+    try:
+        data = request.get_json()
+        if not data or 'date' not in data:
+            return jsonify({'error': 'Date is required'}), 400
+
+        job = job_manager.submit('waste', {'target_date': data['date']})
+        if wants_async():
+            return job_accepted(job)
+
+        # Set a timeout of 5 minutes
+        timeout = 300  # 5 minutes in seconds
+        if not job_manager.wait(job, timeout):
+            job_manager.cancel(job.id)
+            return jsonify({'error': 'Prediction process timed out. Please try again.', 'job_id': job.id}), 504
+
+        if job.status != 'succeeded':
+            return jsonify({'error': f'Prediction failed: {job.error}', 'job_id': job.id}), 500
+
+        return jsonify({
+            'data': job.result,
+            'message': 'Prediction completed successfully',
+            'job_id': job.id
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/waste_risk', methods=['GET'])
+def waste_risk():
+    try:
+        # Rankings and evaluation metrics from the cached waste regressions
+        return jsonify(get_waste_model(WASTE_DATASET).to_dict())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/api/predict_optimal_stock', methods=['POST'])
+def predict_optimal_stock():
+    try:
+        data = request.get_json()
+        target_date = data.get('date')  # Expected format: "YYYY-MM-DD"
+
+        if not target_date:
+            return jsonify({"error": "Date is required in YYYY-MM-DD format"}), 400
+
+        job = job_manager.submit("optimal_stock", {"target_date": target_date})
+        if wants_async():
+            return job_accepted(job)
+
+        # Wait for the in-process job with timeout
+        timeout = 150  # 150 seconds timeout
+        if not job_manager.wait(job, timeout):
+            job_manager.cancel(job.id)
+            return jsonify({
+                "error": "Waste prediction timed out",
+                "details": "The process took too long to complete",
+                "job_id": job.id
+            }), 500
+
+        if job.status != "succeeded":
+            return jsonify({
+                "error": "Failed to generate waste prediction",
+                "details": job.error,
+                "job_id": job.id
+            }), 500
+
+        return jsonify({
+            "status": "success",
+            "data": job.result,
+            "job_id": job.id
+        })
+    except Exception as e:
+        return jsonify({
+            "error": "Internal server error",
+            "details": str(e),
+            "type": type(e).__name__
+        }), 500
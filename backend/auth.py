@@ -0,0 +1,270 @@
+import hmac
+import logging
+import os
+import secrets
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+
+import jwt
+from flask import request, jsonify, g
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from metrics import cache_lookup
+
+logger = logging.getLogger(__name__)
+
+# Signing key for session tokens, shared by every worker process; required outside debug mode
+AUTH_SECRET_KEY = os.environ.get("AUTH_SECRET_KEY")
+
+TOKEN_ALGORITHM = "HS256"
+TOKEN_TTL_SECONDS = int(os.environ.get("TOKEN_TTL_SECONDS", 12 * 3600))
+
+# Verified tokens kept in memory so authenticated requests skip signature checks
+TOKEN_CACHE_SIZE = int(os.environ.get("TOKEN_CACHE_SIZE", 10000))
+
+# How often each worker pulls logouts recorded by the other workers
+TOKEN_REVOCATION_SYNC_SECONDS = float(os.environ.get("TOKEN_REVOCATION_SYNC_SECONDS", 5))
+
+# Fields returned to clients; password hashes never leave the store
+USER_FIELDS = ("name", "email", "restaurant_name")
+PUBLIC_PROJECTION = {field: 1 for field in USER_FIELDS}
+LOGIN_PROJECTION = {**PUBLIC_PROJECTION, "password": 1}
+
+# Prefixes of werkzeug hashes; anything else is a plaintext password from before hashing
+HASH_METHODS = ("scrypt", "pbkdf2")
+
+
+class AuthError(Exception):
+    pass
+
+
+class StoreUnavailable(Exception):
+    pass
+
+
+def is_hashed(password):
+    return isinstance(password, str) and password.split("$", 1)[0].split(":", 1)[0] in HASH_METHODS
+
+
+def public_user(user):
+    return {"id": str(user["_id"]), **{field: user.get(field) for field in USER_FIELDS}}
+
+
+class UserStore:
+    """Users collection with a unique email index and hashed passwords."""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.indexed = False
+        self._lock = threading.Lock()
+
+    def ensure_indexes(self):
+        # Unique email makes signup a single insert instead of a racy find-then-insert
+        with self._lock:
+            if self.indexed:
+                return True
+            try:
+                self.collection.create_index("email", unique=True)
+                self.indexed = True
+            except Exception as e:
+                logger.error(f"Could not create the users email index; signup is disabled until it exists: {e}")
+            return self.indexed
+
+    def create(self, data):
+        # Raises AuthError when the email is taken, StoreUnavailable while uniqueness cannot be enforced
+        from pymongo.errors import DuplicateKeyError
+
+        if not self.ensure_indexes():
+            # Without the index (database down, or duplicates left by older signups) inserts would accept duplicates
+            raise StoreUnavailable("Signup is unavailable until the users email index exists")
+        user = {**data, "password": generate_password_hash(data["password"])}
+        try:
+            result = self.collection.insert_one(user)
+        except DuplicateKeyError:
+            raise AuthError("Email already exists")
+        return public_user({**user, "_id": result.inserted_id})
+
+    def authenticate(self, email, password):
+        # Returns the public user, or None when the credentials do not match
+        if not isinstance(email, str) or not isinstance(password, str):
+            return None
+        user = self.collection.find_one({"email": email}, LOGIN_PROJECTION)
+        if user is None:
+            return None
+
+        stored = user.get("password") or ""
+        if is_hashed(stored):
+            if not check_password_hash(stored, password):
+                return None
+        else:
+            if not hmac.compare_digest(stored.encode(), password.encode()):
+                return None
+            # Legacy plaintext password: replace it with a hash now that we know it
+            self.collection.update_one(
+                {"_id": user["_id"], "password": stored},
+                {"$set": {"password": generate_password_hash(password)}}
+            )
+        return public_user(user)
+
+
+class RevocationStore:
+    """Revoked token ids shared by every worker; a TTL index drops them once the token has expired."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def ensure_indexes(self):
+        try:
+            self.collection.create_index("expires_at", expireAfterSeconds=0)
+            self.collection.create_index("exp")
+        except Exception as e:
+            logger.error(f"Could not create the revoked tokens indexes: {e}")
+
+    def add(self, jti, exp):
+        expires_at = datetime.fromtimestamp(exp, timezone.utc)
+        self.collection.update_one(
+            {"_id": jti}, {"$set": {"exp": exp, "expires_at": expires_at}}, upsert=True
+        )
+
+    def active(self):
+        # {jti: exp} of revocations whose tokens have not expired yet
+        cursor = self.collection.find({"exp": {"$gt": int(time.time())}}, {"exp": 1})
+        return {doc["_id"]: doc["exp"] for doc in cursor}
+
+
+class TokenCache:
+    """Signed session tokens, verified once and then served from a bounded in-memory cache."""
+
+    def __init__(self, secret=AUTH_SECRET_KEY, ttl_seconds=TOKEN_TTL_SECONDS, max_entries=TOKEN_CACHE_SIZE,
+                 revocations=None, sync_seconds=TOKEN_REVOCATION_SYNC_SECONDS):
+        self.secret = secret
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # Without a shared store, a logout only reaches the worker that served it
+        self.revocations = revocations
+        self.sync_seconds = sync_seconds
+        self._tokens = OrderedDict()  # token -> claims
+        self._revoked = {}  # jti -> exp
+        self._synced_at = 0.0
+        self._lock = threading.Lock()
+
+    def _sync_revocations(self):
+        # Pull the other workers' logouts, at most once per sync interval
+        if self.revocations is None:
+            return
+        now = time.time()
+        with self._lock:
+            if now - self._synced_at < self.sync_seconds:
+                return
+            self._synced_at = now
+        try:
+            active = self.revocations.active()
+        except Exception as e:
+            logger.warning(f"Could not sync revoked tokens: {e}")
+            return
+        with self._lock:
+            self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+            self._revoked.update(active)
+
+    def _remember(self, token, claims):
+        with self._lock:
+            self._tokens[token] = claims
+            self._tokens.move_to_end(token)
+            while len(self._tokens) > self.max_entries:
+                self._tokens.popitem(last=False)
+
+    def issue(self, user):
+        now = int(time.time())
+        claims = {
+            "sub": user["id"],
+            "email": user["email"],
+            "iat": now,
+            "exp": now + self.ttl_seconds,
+            "jti": uuid.uuid4().hex,
+        }
+        token = jwt.encode(claims, self.secret, algorithm=TOKEN_ALGORITHM)
+        self._remember(token, claims)
+        return token
+
+    def verify(self, token):
+        # Returns the token's claims or raises AuthError
+        with self._lock:
+            claims = self._tokens.get(token)
+            if claims is not None:
+                self._tokens.move_to_end(token)
+        cache_lookup("auth_token", claims is not None)
+
+        if claims is None:
+            try:
+                claims = jwt.decode(token, self.secret, algorithms=[TOKEN_ALGORITHM], options={"require": ["exp", "sub"]})
+            except jwt.ExpiredSignatureError:
+                raise AuthError("Token expired")
+            except jwt.InvalidTokenError:
+                raise AuthError("Invalid token")
+            self._remember(token, claims)
+
+        if claims["exp"] <= time.time():
+            with self._lock:
+                self._tokens.pop(token, None)
+            raise AuthError("Token expired")
+        self._sync_revocations()
+        with self._lock:
+            revoked = claims.get("jti") in self._revoked
+        if revoked:
+            raise AuthError("Token revoked")
+        return claims
+
+    def revoke(self, token):
+        # Logout; revocations are held until the token would have expired anyway
+        claims = self.verify(token)
+        now = time.time()
+        with self._lock:
+            self._tokens.pop(token, None)
+            self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+            self._revoked[claims["jti"]] = claims["exp"]
+        if self.revocations is not None:
+            try:
+                self.revocations.add(claims["jti"], claims["exp"])
+            except Exception as e:
+                raise StoreUnavailable(f"Could not record the logout for other workers: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {"cached_tokens": len(self._tokens), "revoked_tokens": len(self._revoked)}
+
+
+token_cache = TokenCache()
+
+
+def require_secret_key(debug=False):
+    # Called at app startup: a per-process key would make each worker reject the others' tokens
+    if token_cache.secret:
+        return
+    if not debug:
+        raise RuntimeError("AUTH_SECRET_KEY must be set; tokens are signed with it and shared across workers")
+    token_cache.secret = secrets.token_hex(32)
+    logger.warning("AUTH_SECRET_KEY is not set; debug mode signs tokens with a per-process key that dies with it")
+
+
+def bearer_token(header):
+    # "Authorization: Bearer <token>" -> token
+    scheme, _, token = (header or "").partition(" ")
+    if scheme.lower() != "bearer" or not token.strip():
+        raise AuthError("Missing bearer token")
+    return token.strip()
+
+
+def login_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        # Bearer tokens from /login are checked against the in-process token cache, not the database
+        try:
+            g.user = token_cache.verify(bearer_token(request.headers.get("Authorization")))
+        except AuthError as e:
+            return jsonify({"error": str(e)}), 401
+        return f(*args, **kwargs)
+    return decorated_function
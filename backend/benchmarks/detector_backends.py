@@ -0,0 +1,128 @@
+"""Parity and latency/memory comparison of the detector backends.
+
+    python benchmarks/detector_backends.py --images detection_outputs --runs 20
+
+Each backend runs in its own process so peak memory is measured separately.
+Exits with status 1 if any backend's per-image counts differ from torch, if
+any requested backend fails, or if torch is not among the backends compared.
+"""
+import argparse
+import glob
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+# Make the backend modules importable when run as a script
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+# backend label -> environment for the detector module
+BACKENDS = {
+    "torch": {"DETECTOR_BACKEND": "torch"},
+    "onnx": {"DETECTOR_BACKEND": "onnx", "DETECTOR_ONNX_INT8": "false"},
+    "onnx-int8": {"DETECTOR_BACKEND": "onnx", "DETECTOR_ONNX_INT8": "true"},
+}
+
+
+def peak_rss_mb():
+    # ru_maxrss is kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_backend(image_paths, runs):
+    import cv2
+    from detector import Detector, count_items
+
+    images = [cv2.imread(path) for path in image_paths]
+    baseline_mb = peak_rss_mb()
+
+    detector = Detector()
+    start = time.perf_counter()
+    detector.warmup()
+    load_seconds = time.perf_counter() - start
+
+    counts = [count_items(detections) for detections in detector.predict_batch(images, batch_size=1)]
+
+    latencies = []
+    for _ in range(runs):
+        for image in images:
+            start = time.perf_counter()
+            detector.predict(image, verbose=False)
+            latencies.append(time.perf_counter() - start)
+
+    return {
+        "load_and_warmup_seconds": round(load_seconds, 3),
+        "latency_ms_median": round(float(np.median(latencies)) * 1000, 2),
+        "latency_ms_p95": round(float(np.percentile(latencies, 95)) * 1000, 2),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "model_rss_mb": round(peak_rss_mb() - baseline_mb, 1),
+        "counts": dict(zip(map(os.path.basename, image_paths), counts)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", default=os.path.join(BASE_DIR, "detection_outputs"),
+                        help="directory of .jpg/.png images")
+    parser.add_argument("--runs", type=int, default=10, help="timed passes over the images")
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="comma-separated backends to compare")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    image_paths = sorted(
+        path for ext in ("jpg", "jpeg", "png") for path in glob.glob(os.path.join(args.images, f"*.{ext}"))
+    )
+    if not image_paths:
+        print(json.dumps({"error": f"No images found in {args.images}"}))
+        sys.exit(1)
+
+    if args.worker:
+        print(json.dumps(run_backend(image_paths, args.runs)))
+        return
+
+    report = {}
+    for name in args.backends.split(","):
+        env = {**os.environ, **BACKENDS[name]}
+        proc = subprocess.run(
+            [sys.executable, __file__, "--worker", name, "--images", args.images, "--runs", str(args.runs)],
+            env=env, capture_output=True, text=True
+        )
+        if proc.returncode != 0:
+            report[name] = {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"}
+            continue
+        report[name] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    # A crashed backend, or no torch reference to compare against, fails the parity check
+    failed = sorted(name for name, result in report.items() if "error" in result)
+    reference = report.get("torch", {}).get("counts")
+
+    # Parity: same items counted on every image as the PyTorch path
+    mismatches = {}
+    if reference is not None:
+        for name, result in report.items():
+            if name == "torch" or "counts" not in result:
+                continue
+            diff = {image: {"torch": reference[image], name: counts}
+                    for image, counts in result["counts"].items() if counts != reference.get(image)}
+            if diff:
+                mismatches[name] = diff
+
+    print(json.dumps({
+        "images": len(image_paths),
+        "backends": report,
+        "failed_backends": failed,
+        "reference_missing": reference is None,
+        "count_mismatches": mismatches,
+    }, indent=4))
+    if mismatches or failed or reference is None:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,392 @@
+"""End-to-end latency, memory and per-stage timings of the API endpoints.
+
+    python benchmarks/endpoints.py --runs 5 --output bench.json
+    python benchmarks/endpoints.py --baseline bench.json --tolerance 0.25
+
+Each endpoint runs in its own process through the Flask test client, with
+MongoDB replaced by an in-memory collection and Gemini by the deterministic
+stub LLM backend (LLM_BACKEND=stub). Model, dataset, LLM and detection caches
+point at a fresh temporary directory, so the first ("cold") request pays for
+parsing, fitting and the LLM call; the following --runs requests are "warm".
+Detection uses DETECTOR_MODEL_PATH and reports the endpoint's error when the
+weights are missing.
+
+--scales runs every endpoint on synthetic datasets of growing size (see
+synthetic_data.py), e.g. --scales 5x1,50x2,200x5 for items x years, so latency
+and memory can be charted against items x days.
+
+With --baseline, cold and median warm latency and peak RSS are compared to a
+previous --output file, and so is the status code: a crashed run or a changed
+status (e.g. a fast 500) counts as a regression. The script exits with status
+1 on any regression.
+"""
+import argparse
+import glob
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+
+# Make the backend modules importable when run as a script
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+FORECAST_DATE = "2025-01-15"
+
+
+def detection_image():
+    paths = sorted(glob.glob(os.path.join(BASE_DIR, "detection_outputs", "*.jpg")))
+    if paths:
+        with open(paths[0], "rb") as f:
+            return f.read()
+    import cv2
+    ok, data = cv2.imencode(".jpg", np.random.default_rng(0).integers(0, 255, (480, 640, 3), dtype=np.uint8))
+    return data.tobytes()
+
+
+# endpoint -> client call; job-backed endpoints run synchronously so the request covers the workflow
+ENDPOINTS = {
+    "generate_forecast": lambda client: client.post("/api/generate_forecast", json={"date": FORECAST_DATE}),
+    "compare_years": lambda client: client.post(
+        "/api/compare_years", json={"date": FORECAST_DATE, "years": "all"}
+    ),
+    "predict_waste": lambda client: client.post("/api/predict_waste", json={"date": FORECAST_DATE}),
+    "predict_optimal_stock": lambda client: client.post("/api/predict_optimal_stock", json={"date": FORECAST_DATE}),
+    "menu": lambda client: client.get("/menu"),
+    "detect_and_classify": lambda client: client.post(
+        "/api/detect_and_classify",
+        data={"image": (io.BytesIO(detection_image()), "image.jpg"), "annotate": "true"},
+        content_type="multipart/form-data",
+    ),
+}
+
+
+class InMemoryCollection:
+    """The slice of a pymongo collection the app uses, backed by a list of dicts."""
+
+    def __init__(self):
+        self.documents = []
+        self._lock = threading.Lock()
+
+    def _matches(self, document, query):
+        return all(document.get(key) == value for key, value in (query or {}).items())
+
+    def find_one(self, query=None, projection=None):
+        with self._lock:
+            for document in self.documents:
+                if self._matches(document, query):
+                    if projection:
+                        return {key: document[key] for key in projection if key in document}
+                    return dict(document)
+        return None
+
+    def insert_one(self, document):
+        with self._lock:
+            document.setdefault("_id", len(self.documents) + 1)
+            self.documents.append(dict(document))
+
+    def update_one(self, query, update):
+        with self._lock:
+            for document in self.documents:
+                if self._matches(document, query):
+                    document.update(update.get("$set", {}))
+                    return
+
+    def create_index(self, *args, **kwargs):
+        return None
+
+
+class InMemoryDatabase:
+    def __init__(self):
+        self._collections = defaultdict(InMemoryCollection)
+
+    def __getattr__(self, name):
+        return self._collections[name]
+
+    def command(self, name):
+        return {"ok": 1.0}
+
+
+class InMemoryMongo:
+    # Drop-in for flask_pymongo.PyMongo(app)
+    def __init__(self, app=None, *args, **kwargs):
+        self.db = InMemoryDatabase()
+
+
+class StageTimer:
+    """Wall time per wrapped callable, summed over every call made during one request."""
+
+    def __init__(self):
+        self.totals = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def wrap(self, owner, attribute, stage):
+        func = getattr(owner, attribute)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.totals[stage] += time.perf_counter() - start
+
+        setattr(owner, attribute, timed)
+
+    def take(self):
+        with self._lock:
+            totals = {stage: round(seconds * 1000, 2) for stage, seconds in self.totals.items()}
+            self.totals.clear()
+        return totals
+
+
+def instrument(timer):
+    import api_forecasting
+    import api_vision
+    import forecast_scheduler
+    from llm_cache import llm_cache
+    from model_registry import registry
+    from recipes import recipe_matrix
+
+    timer.wrap(api_forecasting, "forecast_consumption", "forecast_consumption")
+    timer.wrap(api_forecasting, "same_day_by_year", "same_day_by_year")
+    timer.wrap(api_vision, "decode_image", "decode_image")
+    timer.wrap(api_vision, "annotation_payload", "annotate")
+    timer.wrap(api_vision.detector, "predict", "detector_predict")
+    timer.wrap(registry, "get_models", "get_models")
+    timer.wrap(forecast_scheduler, "predict_item_sales", "predict_item_sales")
+    timer.wrap(recipe_matrix, "consumption_frame", "consumption_frame")
+    timer.wrap(llm_cache, "generate_json", "llm")
+
+
+def job_stages(job):
+    # Time between consecutive workflow progress events, per-item fit events folded into the next stage
+    if job is None or job.started_at is None:
+        return {}
+    stages = {}
+    previous = job.started_at
+    for event in job.events:
+        if event["event"] == "progress" and event.get("stage") != "item_fitted":
+            stages[event["stage"]] = round((event["time"] - previous) * 1000, 2)
+            previous = event["time"]
+    if job.finished_at is not None:
+        stages["finish"] = round((job.finished_at - previous) * 1000, 2)
+    return stages
+
+
+def peak_rss_mb():
+    # ru_maxrss is kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def request_once(client, call, timer, job_manager):
+    timer.take()
+    start = time.perf_counter()
+    response = call(client)
+    elapsed = time.perf_counter() - start
+    body = response.get_json(silent=True) or {}
+    sample = {
+        "ms": round(elapsed * 1000, 2),
+        "status": response.status_code,
+        "stages": timer.take(),
+    }
+    if response.status_code >= 400:
+        sample["error"] = body.get("error")
+    if isinstance(body, dict) and body.get("job_id"):
+        sample["job_stages"] = job_stages(job_manager.get(body["job_id"]))
+    return sample
+
+
+def run_endpoint(name, runs):
+    import flask_pymongo
+    flask_pymongo.PyMongo = InMemoryMongo
+
+    baseline_mb = peak_rss_mb()
+    start = time.perf_counter()
+    import app as app_module
+    import_seconds = time.perf_counter() - start
+    from jobs import job_manager
+
+    timer = StageTimer()
+    instrument(timer)
+    client = app_module.app.test_client()
+
+    call = ENDPOINTS[name]
+    cold = request_once(client, call, timer, job_manager)
+    warm = [request_once(client, call, timer, job_manager) for _ in range(runs)]
+    latencies = [sample["ms"] for sample in warm]
+
+    stages = defaultdict(list)
+    for sample in warm:
+        for stage, ms in sample["stages"].items():
+            stages[stage].append(ms)
+
+    return {
+        "import_seconds": round(import_seconds, 3),
+        "status": cold["status"],
+        "error": cold.get("error"),
+        "cold_ms": cold["ms"],
+        "cold_stages": cold["stages"],
+        "cold_job_stages": cold.get("job_stages"),
+        "warm_ms_median": round(float(np.median(latencies)), 2) if latencies else None,
+        "warm_ms_p95": round(float(np.percentile(latencies, 95)), 2) if latencies else None,
+        "warm_stages_median": {stage: round(float(np.median(ms)), 2) for stage, ms in stages.items()},
+        "warm_job_stages": warm[-1].get("job_stages") if warm else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "app_rss_mb": round(peak_rss_mb() - baseline_mb, 1),
+    }
+
+
+def worker_env(cache_dir, reuse_caches):
+    env = {
+        **os.environ,
+        "LLM_BACKEND": "stub",
+        "AUTH_SECRET_KEY": os.environ.get("AUTH_SECRET_KEY", "benchmark-secret-key-for-signing-session-tokens"),
+        "FORECAST_SCHEDULER": "false",
+        "DETECTOR_WARMUP": "false",
+    }
+    if not reuse_caches:
+        for var, sub in (("MODEL_CACHE_DIR", "models"), ("DATASET_CACHE_DIR", "datasets"),
+                         ("LLM_CACHE_DIR", "llm"), ("DETECTION_STORE_DIR", "detections"),
+                         ("DETECTOR_ONNX_DIR", "onnx")):
+            env[var] = os.path.join(cache_dir, sub)
+    return env
+
+
+# Metrics compared against the baseline; higher is worse for all of them
+COMPARED = ("cold_ms", "warm_ms_median", "peak_rss_mb")
+
+
+def compare(current, previous, tolerance, min_delta_ms):
+    # current/previous: {endpoint: result}
+    regressions = []
+    for name, result in current.items():
+        before = previous.get(name) or {}
+        # A crashed run, a changed status or a newly failing endpoint is a regression however fast it is
+        if "status" not in result:
+            regressions.append({"endpoint": name, "metric": "status", "baseline": before.get("status"),
+                                "current": None, "error": result.get("error")})
+            continue
+        if not before:
+            continue
+        if result["status"] != before.get("status"):
+            regressions.append({"endpoint": name, "metric": "status", "baseline": before.get("status"),
+                                "current": result["status"], "error": result.get("error")})
+            continue
+        for metric in COMPARED:
+            new, old = result.get(metric), before.get(metric)
+            if new is None or old is None:
+                continue
+            # Small absolute changes in fast endpoints are noise, not regressions
+            floor = 0 if metric == "peak_rss_mb" else min_delta_ms
+            if new > old * (1 + tolerance) and new - old > floor:
+                regressions.append({"endpoint": name, "metric": metric, "baseline": old, "current": new,
+                                    "change": round(new / old - 1, 3) if old else None})
+    return regressions
+
+
+def run_endpoints(names, runs, reuse_caches, extra_env=None):
+    results = {}
+    for name in names:
+        with tempfile.TemporaryDirectory(prefix="bench-") as cache_dir:
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--worker", name, "--runs", str(runs)],
+                env={**worker_env(cache_dir, reuse_caches), **(extra_env or {})},
+                cwd=BASE_DIR, capture_output=True, text=True
+            )
+        lines = proc.stdout.strip().splitlines()
+        if proc.returncode != 0 or not lines:
+            results[name] = {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"}
+            continue
+        results[name] = json.loads(lines[-1])
+    return results
+
+
+def parse_scales(value):
+    # "50x2,200x5" -> [(50, 2), (200, 5)]: items x years of daily history
+    scales = []
+    for scale in value.split(","):
+        items, years = scale.lower().split("x")
+        scales.append((int(items), int(years)))
+    return scales
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="comma-separated endpoints to run")
+    parser.add_argument("--runs", type=int, default=5, help="warm requests after the cold one")
+    parser.add_argument("--reuse-caches", action="store_true",
+                        help="keep the repo's model/dataset/LLM caches instead of starting empty")
+    parser.add_argument("--scales", help="synthetic datasets to run on instead of the bundled ones, "
+                                         "as ITEMSxYEARS,... (e.g. 50x2,200x5)")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="previous --output file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0, help="ignore latency changes below this")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_endpoint(args.worker, args.runs)))
+        return
+
+    names = args.endpoints.split(",")
+    for name in names:
+        if name not in ENDPOINTS:
+            parser.error(f"Unknown endpoint: {name}")
+
+    report = {"runs": args.runs, "reuse_caches": args.reuse_caches, "created_at": time.time()}
+    if args.scales:
+        from synthetic_data import write_datasets
+
+        report["scales"] = {}
+        for items, years in parse_scales(args.scales):
+            with tempfile.TemporaryDirectory(prefix="bench-data-") as data_dir:
+                dataset = write_datasets(data_dir, items=items, years=years)
+                env = {"DATASET_DIR": data_dir, "RECIPES_PATH": dataset["recipes_path"]}
+                report["scales"][f"{items}x{years}"] = {
+                    "items": items,
+                    "days": dataset["days"],
+                    "rows": {name: info["rows"] for name, info in dataset["files"].items()},
+                    "endpoints": run_endpoints(names, args.runs, args.reuse_caches, env),
+                }
+    else:
+        report["endpoints"] = run_endpoints(names, args.runs, args.reuse_caches)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if args.scales:
+            report["regressions"] = [
+                {"scale": label, **regression}
+                for label, scale in report["scales"].items()
+                for regression in compare(
+                    scale["endpoints"], baseline.get("scales", {}).get(label, {}).get("endpoints", {}),
+                    args.tolerance, args.min_delta_ms
+                )
+            ]
+        else:
+            report["regressions"] = compare(
+                report["endpoints"], baseline.get("endpoints", {}), args.tolerance, args.min_delta_ms
+            )
+
+    text = json.dumps(report, indent=4)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    print(text)
+    if report.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Holdout accuracy and latency of the fast forecast engine against Prophet.
+
+    python benchmarks/forecast_engines.py --datasets realistic,monthly
+
+The last --holdout-days (daily data) or --holdout-months (monthly data) of
+each item's history are held out; both engines are fitted on the rest.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Make the backend modules importable when run as a script
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from model_registry import load_histories, fit_prophet, DATASETS
+from fast_forecast import fit_fast_model
+
+
+def errors(actual, predicted):
+    diff = predicted - actual
+    return {
+        "mae": round(float(np.mean(np.abs(diff))), 3),
+        "rmse": round(float(np.sqrt(np.mean(diff ** 2))), 3),
+        "mape": round(float(np.mean(np.abs(diff) / np.maximum(np.abs(actual), 1)) * 100), 2),
+    }
+
+
+def benchmark_dataset(csv_path, holdout):
+    histories = load_histories(csv_path)
+    train = {item: history.iloc[:-holdout] for item, history in histories.items()}
+    test = {item: history.iloc[-holdout:] for item, history in histories.items()}
+
+    start = time.perf_counter()
+    fast_model = fit_fast_model(train)
+    fast_fit = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fast_predictions = {item: fast_model.predict(test[item]["ds"], item)["yhat"].to_numpy() for item in test}
+    fast_predict = time.perf_counter() - start
+
+    prophet_fit = 0.0
+    prophet_predict = 0.0
+    prophet_predictions = {}
+    for item, history in train.items():
+        start = time.perf_counter()
+        model = fit_prophet(history)
+        prophet_fit += time.perf_counter() - start
+
+        start = time.perf_counter()
+        prophet_predictions[item] = model.predict(pd.DataFrame({"ds": test[item]["ds"]}))["yhat"].to_numpy()
+        prophet_predict += time.perf_counter() - start
+
+    items = {}
+    for item in test:
+        actual = test[item]["y"].to_numpy(dtype=float)
+        items[item] = {
+            "prophet": errors(actual, prophet_predictions[item]),
+            "fast": errors(actual, fast_predictions[item]),
+            # How far apart the two engines' forecasts are
+            "engine_gap_mae": round(float(np.mean(np.abs(fast_predictions[item] - prophet_predictions[item]))), 3),
+        }
+
+    def mean_of(engine, metric):
+        return round(float(np.mean([result[engine][metric] for result in items.values()])), 3)
+
+    return {
+        "items": len(items),
+        "holdout": holdout,
+        "latency_seconds": {
+            "prophet_fit": round(prophet_fit, 3),
+            "prophet_predict": round(prophet_predict, 3),
+            "fast_fit": round(fast_fit, 4),
+            "fast_predict": round(fast_predict, 4),
+        },
+        "mean_mae": {"prophet": mean_of("prophet", "mae"), "fast": mean_of("fast", "mae")},
+        "mean_mape": {"prophet": mean_of("prophet", "mape"), "fast": mean_of("fast", "mape")},
+        "per_item": items,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--datasets", default="realistic,monthly", help="comma-separated dataset names")
+    parser.add_argument("--holdout-days", type=int, default=90)
+    parser.add_argument("--holdout-months", type=int, default=12)
+    args = parser.parse_args()
+
+    # Prophet and cmdstanpy log every fit
+    logging.getLogger("prophet").setLevel(logging.WARNING)
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+
+    report = {}
+    for name in args.datasets.split(","):
+        holdout = args.holdout_months if name == "monthly" else args.holdout_days
+        report[name] = benchmark_dataset(DATASETS[name], holdout)
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Memory, latency and yhat parity of the parameter-only predictor against Prophet.
+
+    python benchmarks/prophet_predictors.py --datasets realistic,monthly
+
+Each item is fitted once; the Prophet object and its extracted params are then
+compared on retained memory, predict latency (with and without Prophet's
+uncertainty sampling) and the largest yhat difference.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+# Make the backend modules importable when run as a script
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from model_registry import load_histories, fit_prophet, model_from_json, DATASETS
+from prophet_params import ProphetParams, verify_params
+from prophet.serialize import model_to_json
+
+
+def retained_bytes(load):
+    # Python heap still held once the loaded object is the only thing left
+    tracemalloc.start()
+    obj = load()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, size
+
+
+def timed(predict, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        predict()
+    return (time.perf_counter() - start) / repeats
+
+
+def benchmark_dataset(csv_path, horizon, repeats):
+    items = {}
+    for item, history in load_histories(csv_path).items():
+        model_json = model_to_json(fit_prophet(history))
+        model, model_bytes = retained_bytes(lambda: model_from_json(model_json))
+        params_json = ProphetParams.from_model(model).to_json()
+        predictor, params_bytes = retained_bytes(lambda: ProphetParams(json.loads(params_json)))
+
+        future = pd.DataFrame({
+            "ds": pd.date_range(history["ds"].max() + pd.Timedelta(days=1), periods=horizon, freq="D")
+        })
+        prophet_full = timed(lambda: model.predict(future), 1)
+        samples = model.uncertainty_samples
+        model.uncertainty_samples = 0
+        prophet_mean = timed(lambda: model.predict(future), repeats)
+        model.uncertainty_samples = samples
+
+        items[item] = {
+            "serialized_bytes": {"prophet": len(model_json), "params": len(params_json)},
+            "retained_bytes": {"prophet": model_bytes, "params": params_bytes},
+            "predict_ms": {
+                "prophet": round(prophet_full * 1000, 2),
+                "prophet_no_intervals": round(prophet_mean * 1000, 2),
+                "params": round(timed(lambda: predictor.predict(future), repeats) * 1000, 3),
+                "params_no_intervals": round(
+                    timed(lambda: predictor.predict(future, intervals=False), repeats) * 1000, 3
+                ),
+            },
+            # Largest |yhat| difference over history plus future, relative to the item's y scale
+            "max_relative_error": verify_params(model, predictor),
+        }
+
+    def total(section, key):
+        return int(sum(result[section][key] for result in items.values()))
+
+    def mean_ms(key):
+        return round(float(np.mean([result["predict_ms"][key] for result in items.values()])), 3)
+
+    return {
+        "items": len(items),
+        "horizon_days": horizon,
+        "serialized_bytes": {"prophet": total("serialized_bytes", "prophet"),
+                             "params": total("serialized_bytes", "params")},
+        "retained_bytes": {"prophet": total("retained_bytes", "prophet"),
+                           "params": total("retained_bytes", "params")},
+        "mean_predict_ms": {key: mean_ms(key) for key in
+                            ("prophet", "prophet_no_intervals", "params", "params_no_intervals")},
+        "max_relative_error": max(result["max_relative_error"] for result in items.values()),
+        "per_item": items,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--datasets", default="realistic,monthly", help="comma-separated dataset names")
+    parser.add_argument("--horizon-days", type=int, default=14)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    # Prophet and cmdstanpy log every fit
+    logging.getLogger("prophet").setLevel(logging.WARNING)
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+
+    report = {}
+    for name in args.datasets.split(","):
+        report[name] = benchmark_dataset(DATASETS[name], args.horizon_days, args.repeats)
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Worker startup cost per subsystem selection: import time, memory and heavy libraries loaded.
+
+    python benchmarks/startup.py --runs 5
+    python benchmarks/startup.py --configs auth auth,menu all
+
+Each configuration imports app.py in fresh processes with ENABLED_SUBSYSTEMS
+set accordingly, then serves one /metrics request. The forecast scheduler and
+detector warm-up are disabled so only import and app construction are timed.
+No database is needed: PyMongo connects lazily, and the startup index check
+runs in the background.
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+# Make the backend modules importable when run as a script
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+DEFAULT_CONFIGS = ["auth", "auth,menu", "forecasting", "waste", "vision", "all"]
+
+# Libraries whose presence in sys.modules is reported after startup
+HEAVY_MODULES = (
+    "pandas", "numpy", "scipy", "sklearn", "prophet", "cmdstanpy", "xgboost", "cv2", "ultralytics", "torch",
+    "onnxruntime", "google.generativeai", "pymongo",
+)
+
+
+def rss_mb():
+    # ru_maxrss is kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure_startup():
+    baseline_mb = rss_mb()
+    modules_before = len(sys.modules)
+    start = time.perf_counter()
+    import app as app_module
+    import_seconds = time.perf_counter() - start
+
+    client = app_module.app.test_client()
+    start = time.perf_counter()
+    status = client.get("/metrics").status_code
+    first_request_ms = (time.perf_counter() - start) * 1000
+
+    return {
+        "import_seconds": round(import_seconds, 3),
+        "first_request_ms": round(first_request_ms, 2),
+        "first_request_status": status,
+        "startup_rss_mb": round(rss_mb() - baseline_mb, 1),
+        "modules_imported": len(sys.modules) - modules_before,
+        "routes": len(list(app_module.app.url_map.iter_rules())),
+        "heavy_modules": [name for name in HEAVY_MODULES if name in sys.modules],
+    }
+
+
+def worker_env(subsystems, mongo_uri):
+    return {
+        **os.environ,
+        "ENABLED_SUBSYSTEMS": subsystems,
+        "MONGO_URI": mongo_uri,
+        "LLM_BACKEND": "stub",
+        "AUTH_SECRET_KEY": os.environ.get("AUTH_SECRET_KEY", "benchmark-secret-key-for-signing-session-tokens"),
+        "FORECAST_SCHEDULER": "false",
+        "DETECTOR_WARMUP": "false",
+    }
+
+
+def run_config(subsystems, runs, mongo_uri):
+    # Fresh process per run so nothing is already imported or cached in memory
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker"],
+            env=worker_env(subsystems, mongo_uri), cwd=BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    def median(key):
+        return round(statistics.median(sample[key] for sample in samples), 3)
+
+    return {
+        "import_seconds_median": median("import_seconds"),
+        "import_seconds_min": min(sample["import_seconds"] for sample in samples),
+        "first_request_ms_median": median("first_request_ms"),
+        "startup_rss_mb_median": median("startup_rss_mb"),
+        "modules_imported": samples[-1]["modules_imported"],
+        "routes": samples[-1]["routes"],
+        "heavy_modules": samples[-1]["heavy_modules"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--configs", nargs="+", default=DEFAULT_CONFIGS,
+                        help="ENABLED_SUBSYSTEMS values to compare, e.g. auth auth,menu all")
+    parser.add_argument("--runs", type=int, default=3, help="fresh processes per configuration")
+    parser.add_argument("--mongo-uri", default="mongodb://127.0.0.1:27017/kitchensense?serverSelectionTimeoutMS=2000")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(measure_startup()))
+        return
+
+    report = {subsystems: run_config(subsystems, args.runs, args.mongo_uri) for subsystems in args.configs}
+    # Import time and memory saved relative to a process serving everything
+    full = report.get("all")
+    if full:
+        for result in report.values():
+            result["import_speedup_vs_all"] = round(
+                full["import_seconds_median"] / max(result["import_seconds_median"], 1e-6), 2
+            )
+            result["rss_saved_mb_vs_all"] = round(full["startup_rss_mb_median"] - result["startup_rss_mb_median"], 1)
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
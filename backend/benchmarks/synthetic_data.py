@@ -0,0 +1,194 @@
+"""Synthetic sales datasets in the bundled CSV schemas, for scaling benchmarks.
+
+    python benchmarks/synthetic_data.py --items 200 --years 5 --out /tmp/synthetic
+    DATASET_DIR=/tmp/synthetic RECIPES_PATH=/tmp/synthetic/recipes.json python app.py
+
+Writes realistic_dataset.csv and final_dataset.csv (daily, one row per item
+and day), menu_dataset_final.csv (monthly) and the matching recipes.json.
+The daily files follow the bundled ones: "realistic" has weekly and yearly
+seasonality and noisy stock, "final" has flat demand and stock just above
+sales. Prices drift upward month by month, cost is 60% of price and
+profit = sale_units * price - stock_level * cost.
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Grams per stocked unit of each bundled ingredient, as in the bundled daily datasets
+BUNDLED_STOCK_GRAMS = {
+    "apple": 150, "banana": 100, "orange": 70, "cucumber": 75, "okra": 25, "potato": 120, "tomato": 85,
+}
+
+# Column spellings of the bundled menu_dataset_final.csv, which differ from the daily files
+MONTHLY_COLUMN_NAMES = {"orange": "oranges", "potato": "patato", "tomato": "tamto"}
+
+COST_RATIO = 0.6
+MONTHS = ["January", "February", "March", "April", "May", "June", "July",
+          "August", "September", "October", "November", "December"]
+
+
+def make_ingredients(count, rng):
+    # Bundled ingredients first, then numbered ones; {ingredient: grams per stocked unit}
+    grams = dict(list(BUNDLED_STOCK_GRAMS.items())[:count])
+    for j in range(len(grams), count):
+        grams[f"ingredient_{j + 1:03d}"] = int(rng.integers(5, 31)) * 5
+    return grams
+
+
+def make_recipes(items, ingredients, rng, min_ingredients=2, max_ingredients=5):
+    # {dish: {ingredient: grams per dish}}, 2-5 ingredients of 25-200 g each
+    names = list(ingredients)
+    recipes = {}
+    for i in range(items):
+        size = int(rng.integers(min(min_ingredients, len(names)), min(max_ingredients, len(names)) + 1))
+        chosen = rng.choice(len(names), size=size, replace=False)
+        recipes[f"Dish {i + 1:04d}"] = {names[j]: int(rng.integers(5, 41)) * 5 for j in sorted(chosen)}
+    return recipes
+
+
+def seasonal_factor(dates, seasonality):
+    # Yearly peak in October and busier weekends, scaled by `seasonality` (0 = flat)
+    day_of_year = dates.dayofyear.to_numpy()
+    yearly = 0.2 * np.sin(2 * np.pi * (day_of_year - 200) / 365.25)
+    weekend = np.where(dates.dayofweek.to_numpy() >= 5, 0.23, 0.0)
+    return 1 + seasonality * (yearly + weekend)
+
+
+def monthly_prices(start_prices, dates, price_drift):
+    # Prices rise by price_drift per year, stepped once a month
+    months = (dates.year - dates[0].year) * 12 + dates.month - dates[0].month
+    growth = (1 + price_drift) ** (months.to_numpy() / 12)
+    return np.round(np.outer(growth, start_prices)).astype(int)
+
+
+def daily_dataset(recipes, ingredients, start_prices, start, end, rng, seasonality, price_drift, noisy):
+    """One row per item and day, date-major like the bundled CSVs."""
+    items = list(recipes)
+    dates = pd.date_range(start, end, freq="D")
+    n_dates, n_items = len(dates), len(items)
+
+    base = rng.uniform(40, 70, n_items)
+    demand = np.outer(seasonal_factor(dates, seasonality), base)
+    sales = rng.poisson(demand)
+    if noisy:
+        stock = np.round(sales * rng.uniform(1.0, 1.3, sales.shape) + rng.normal(0, 8, sales.shape))
+        stock = np.clip(stock, 0, None).astype(int)
+        # Per-row scatter of the ingredient stock around the nominal grams
+        ingredient_scale = rng.uniform(0.6, 1.15, sales.shape)
+    else:
+        stock = sales + rng.integers(4, 15, sales.shape)
+        ingredient_scale = np.ones(sales.shape)
+
+    price = monthly_prices(start_prices, dates, price_drift)
+    cost = np.round(price * COST_RATIO).astype(int)
+
+    columns = {
+        "item_name": np.tile(np.array(items, dtype=object), n_dates),
+        "date": np.repeat(dates.strftime("%Y-%m-%d").to_numpy(), n_items),
+        "sale_units": sales.ravel(),
+        "stock_level": stock.ravel(),
+        "price": price.ravel(),
+        "cost": cost.ravel(),
+    }
+    for ingredient, grams in ingredients.items():
+        columns[f"stock_{ingredient}"] = np.round(stock * grams * ingredient_scale).astype(int).ravel()
+    columns["profit"] = (sales * price - stock * cost).ravel()
+    return pd.DataFrame(columns)
+
+
+def monthly_dataset(recipes, ingredients, start_year, end_year, rng, seasonality, price_drift):
+    """One row per item and month in the menu_dataset_final.csv schema, rows shuffled like the bundled file."""
+    items = list(recipes)
+    dates = pd.date_range(f"{start_year}-01-01", f"{end_year}-12-01", freq="MS")
+    n_dates, n_items = len(dates), len(items)
+
+    base = rng.uniform(60, 90, n_items)
+    yearly = 1 + seasonality * 0.15 * np.sin(2 * np.pi * (dates.month.to_numpy() - 7) / 12)
+    sales = np.clip(np.round(np.outer(yearly, base) + rng.normal(0, 6, (n_dates, n_items))), 1, None).astype(int)
+    stock = sales + rng.integers(20, 61, sales.shape)
+    price = monthly_prices(rng.uniform(350, 750, n_items), dates, price_drift)
+
+    columns = {
+        "item_name": np.tile(np.array(items, dtype=object), n_dates),
+        "month": np.repeat(np.array([MONTHS[m - 1] for m in dates.month], dtype=object), n_items),
+        "year": np.repeat(dates.year.to_numpy(), n_items),
+        "sale_units": sales.ravel(),
+        "price_per_unit": price.ravel(),
+        "stock_level": stock.ravel(),
+    }
+    for ingredient in sorted(ingredients):
+        grams = np.array([recipes[item].get(ingredient, 0) for item in items])
+        column = MONTHLY_COLUMN_NAMES.get(ingredient, ingredient)
+        columns[f"stock_{column}"] = (stock * grams).ravel()
+        columns[f"sale_{column}"] = (sales * grams).ravel()
+    df = pd.DataFrame(columns)
+    return df.iloc[rng.permutation(len(df))].reset_index(drop=True)
+
+
+def write_datasets(out_dir, items=50, years=3, ingredients=7, end_year=2024, monthly_years=5,
+                   seasonality=1.0, price_drift=0.11, seed=42):
+    """Write all three CSVs and recipes.json into out_dir; returns their paths and sizes."""
+    rng = np.random.default_rng(seed)
+    stock_grams = make_ingredients(ingredients, rng)
+    recipes = make_recipes(items, stock_grams, rng)
+    start = f"{end_year - years + 1}-01-01"
+    end = f"{end_year}-12-31"
+
+    # Both daily files share item prices, as the bundled ones do
+    start_prices = rng.uniform(130, 190, items)
+
+    os.makedirs(out_dir, exist_ok=True)
+    frames = {
+        "realistic_dataset.csv": daily_dataset(
+            recipes, stock_grams, start_prices, start, end, rng, seasonality, price_drift, True
+        ),
+        "final_dataset.csv": daily_dataset(recipes, stock_grams, start_prices, start, end, rng, 0.0, price_drift, False),
+        "menu_dataset_final.csv": monthly_dataset(
+            recipes, stock_grams, end_year - monthly_years + 1, end_year, rng, seasonality, price_drift
+        ),
+    }
+    paths = {}
+    for name, df in frames.items():
+        path = os.path.join(out_dir, name)
+        df.to_csv(path, index=False)
+        paths[name] = {"path": path, "rows": len(df)}
+
+    recipes_path = os.path.join(out_dir, "recipes.json")
+    with open(recipes_path, "w") as f:
+        json.dump(recipes, f, indent=2)
+
+    return {
+        "dataset_dir": out_dir,
+        "recipes_path": recipes_path,
+        "items": items,
+        "ingredients": ingredients,
+        "days": len(pd.date_range(start, end, freq="D")),
+        "files": paths,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", required=True, help="directory to write the datasets into")
+    parser.add_argument("--items", type=int, default=50, help="dishes on the menu")
+    parser.add_argument("--years", type=int, default=3, help="years of daily history")
+    parser.add_argument("--ingredients", type=int, default=7, help="stocked ingredients (first 7 are the bundled ones)")
+    parser.add_argument("--end-year", type=int, default=2024)
+    parser.add_argument("--monthly-years", type=int, default=5, help="years of monthly history")
+    parser.add_argument("--seasonality", type=float, default=1.0, help="strength of weekly/yearly patterns, 0 = flat")
+    parser.add_argument("--price-drift", type=float, default=0.11, help="yearly price increase")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    summary = write_datasets(
+        args.out, items=args.items, years=args.years, ingredients=args.ingredients, end_year=args.end_year,
+        monthly_years=args.monthly_years, seasonality=args.seasonality, price_drift=args.price_drift, seed=args.seed,
+    )
+    print(json.dumps(summary, indent=4))
+
+
+if __name__ == "__main__":
+    main()
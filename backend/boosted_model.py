@@ -0,0 +1,198 @@
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from dataset_service import dataset_fingerprint, load_dataset
+from metrics import stage, cache_lookup, MODEL_FITS
+
+logger = logging.getLogger(__name__)
+
+# Share of the boosted short-term model in the blend; Prophet gets the rest
+FORECAST_BLEND_WEIGHT = float(os.environ.get("FORECAST_BLEND_WEIGHT", 0.3))
+
+# Days past the end of the history the boosted model forecasts (recursively)
+BOOST_HORIZON_DAYS = int(os.environ.get("BOOST_HORIZON_DAYS", 14))
+
+# Days at the end of the history held out to report accuracy
+BOOST_VALIDATION_DAYS = 90
+
+# HistGradientBoostingRegressor supports at most 255 levels per categorical feature
+MAX_CATEGORICAL_ITEMS = 255
+
+LAGS = [1, 7, 14]
+FEATURES = ["item", "lag_1", "lag_7", "lag_14", "rolling_7", "price", "day_of_week", "month"]
+
+_models = {}  # csv path -> BoostedModel
+_lock = threading.Lock()
+
+
+def make_regressor(n_items):
+    # XGBoost when installed, otherwise scikit-learn's histogram boosting
+    try:
+        from xgboost import XGBRegressor
+        return "xgboost", XGBRegressor(
+            n_estimators=300, max_depth=6, learning_rate=0.05, tree_method="hist", n_jobs=os.cpu_count()
+        )
+    except ImportError:
+        from sklearn.ensemble import HistGradientBoostingRegressor
+        # Larger menus get a numeric item column instead (see item_codes)
+        categorical = [0] if n_items <= MAX_CATEGORICAL_ITEMS else None
+        return "sklearn", HistGradientBoostingRegressor(
+            max_iter=300, learning_rate=0.05, categorical_features=categorical, random_state=42
+        )
+
+
+def item_codes(backend, sales):
+    # Item index as a category, or each item's mean sales (target encoding) past the sklearn category cap
+    if backend == "sklearn" and sales.shape[1] > MAX_CATEGORICAL_ITEMS:
+        return sales.mean().to_numpy(dtype=float)
+    return np.arange(sales.shape[1])
+
+
+def build_features(sales, prices, dates, codes=None):
+    """Feature rows (dates x items, stacked date-major) from a dates x items sales history."""
+    n_items = sales.shape[1]
+    positions = sales.index.get_indexer(dates)
+    if (positions < 0).any():
+        raise KeyError("Feature dates must be present in the sales index")
+
+    values = sales.to_numpy(dtype=float)
+    codes = np.arange(n_items) if codes is None else codes
+    columns = {"item": np.tile(codes, len(dates))}
+    for lag in LAGS:
+        lagged = np.full((len(dates), n_items), np.nan)
+        ok = positions - lag >= 0
+        lagged[ok] = values[positions[ok] - lag]
+        columns[f"lag_{lag}"] = lagged.ravel()
+
+    rolling = np.full((len(dates), n_items), np.nan)
+    for k, position in enumerate(positions):
+        if position >= 7:
+            rolling[k] = values[position - 7:position].mean(axis=0)
+    columns["rolling_7"] = rolling.ravel()
+    columns["price"] = prices.to_numpy(dtype=float)[positions].ravel()
+
+    dates = pd.DatetimeIndex(dates)
+    columns["day_of_week"] = np.repeat(dates.dayofweek.to_numpy(), n_items)
+    columns["month"] = np.repeat(dates.month.to_numpy(), n_items)
+    return pd.DataFrame(columns)[FEATURES]
+
+
+class BoostedModel:
+    def __init__(self, fingerprint, backend, regressor, codes, sales, prices, metrics):
+        self.fingerprint = fingerprint
+        self.backend = backend
+        self.regressor = regressor
+        self.codes = codes  # value of the item feature per item
+        self.sales = sales  # dates x items history
+        self.prices = prices  # dates x items
+        self.items = list(sales.columns)
+        self.metrics = metrics
+        self.trained_at = time.time()
+
+    @property
+    def last_date(self):
+        return self.sales.index[-1]
+
+    def predict_item_sales(self, dates):
+        """dates x items sales; dates past the short-term horizon come back as NaN."""
+        dates = pd.DatetimeIndex(dates, name='date')
+        result = pd.DataFrame(np.nan, index=dates, columns=self.items)
+
+        # Dates inside the history use the observed lags, in one batched predict
+        known = dates[dates.isin(self.sales.index)]
+        if len(known):
+            X = build_features(self.sales, self.prices, known, self.codes)
+            result.loc[known] = self.regressor.predict(X).reshape(len(known), -1)
+
+        horizon_end = self.last_date + pd.Timedelta(days=BOOST_HORIZON_DAYS)
+        future = dates[(dates > self.last_date) & (dates <= horizon_end)]
+        if len(future):
+            # Recursive: each day's prediction becomes the next day's lag; prices stay at their last value
+            steps = pd.date_range(self.last_date + pd.Timedelta(days=1), future.max(), freq='D')
+            sales = pd.concat([self.sales.iloc[-max(LAGS):], pd.DataFrame(np.nan, index=steps, columns=self.items)])
+            prices = pd.concat([
+                self.prices.iloc[-max(LAGS):],
+                pd.DataFrame([self.prices.iloc[-1].to_numpy()] * len(steps), index=steps, columns=self.items)
+            ])
+            for step in steps:
+                sales.loc[step] = self.regressor.predict(build_features(sales, prices, [step], self.codes))
+            result.loc[future] = sales.loc[future].to_numpy()
+        return result
+
+    def to_dict(self):
+        return {
+            "fingerprint": self.fingerprint,
+            "backend": self.backend,
+            "item_encoding": "mean_sales" if self.codes.dtype.kind == "f" else "category",
+            "items": self.items,
+            "history_end": self.last_date.strftime('%Y-%m-%d'),
+            "horizon_days": BOOST_HORIZON_DAYS,
+            "trained_at": self.trained_at,
+            "metrics": self.metrics,
+        }
+
+
+def train_boosted_model(csv_path):
+    # One global model over every item of a daily sales dataset
+    df = load_dataset(csv_path, copy=False)
+    sales = df.pivot_table(index='date', columns='item_name', values='sale_units', aggfunc='sum', observed=True)
+    prices = df.pivot_table(index='date', columns='item_name', values='price', aggfunc='mean', observed=True)
+    sales.columns = sales.columns.astype(str)
+    prices.columns = prices.columns.astype(str)
+    dates = pd.date_range(sales.index.min(), sales.index.max(), freq='D', name='date')
+    sales = sales.reindex(dates).interpolate(limit_direction='both')
+    prices = prices.reindex(index=dates, columns=sales.columns).ffill().bfill()
+
+    n_items = sales.shape[1]
+    y = sales.to_numpy(dtype=float)[max(LAGS):].ravel()
+
+    # Accuracy on the most recent days, one-step-ahead, before refitting on everything;
+    # the holdout model's item encoding only sees the training days
+    split = len(y) - BOOST_VALIDATION_DAYS * n_items
+    backend, regressor = make_regressor(n_items)
+    codes = item_codes(backend, sales.iloc[:-BOOST_VALIDATION_DAYS])
+    X = build_features(sales, prices, dates[max(LAGS):], codes)
+    regressor.fit(X.iloc[:split], y[:split])
+    error = regressor.predict(X.iloc[split:]) - y[split:]
+    metrics = {
+        "validation_days": BOOST_VALIDATION_DAYS,
+        "mae": float(np.mean(np.abs(error))),
+        "rmse": float(np.sqrt(np.mean(error ** 2))),
+    }
+
+    backend, regressor = make_regressor(n_items)
+    codes = item_codes(backend, sales)
+    regressor.fit(build_features(sales, prices, dates[max(LAGS):], codes), y)
+    return BoostedModel(dataset_fingerprint(csv_path), backend, regressor, codes, sales, prices, metrics)
+
+
+def get_boosted_model(csv_path):
+    # Retrained only when the dataset fingerprint changes
+    fingerprint = dataset_fingerprint(csv_path)
+    with _lock:
+        model = _models.get(csv_path)
+        cache_lookup("boosted_model", model is not None and model.fingerprint == fingerprint)
+        if model is not None and model.fingerprint == fingerprint:
+            return model
+
+        logger.info(f"Training boosted sales model for {csv_path}")
+        with stage("boosted_model_train"):
+            model = train_boosted_model(csv_path)
+        MODEL_FITS.inc(model="boosted", result="ok")
+        _models[csv_path] = model
+        return model
+
+
+def blend_forecasts(long_term, short_term, weight=FORECAST_BLEND_WEIGHT):
+    # weight * boosted + (1 - weight) * long-term where the boosted model covers the date;
+    # linear, so it applies equally to sales and to ingredient consumption frames
+    blended = long_term.copy()
+    covered = short_term.reindex(index=long_term.index, columns=long_term.columns)
+    mask = covered.notna()
+    blended[mask] = (1 - weight) * long_term[mask] + weight * covered[mask]
+    return blended
@@ -0,0 +1,70 @@
+import threading
+
+import pandas as pd
+
+from dataset_service import dataset_fingerprint, load_dataset
+from recipes import recipe_matrix
+from metrics import stage, cache_lookup
+
+_tables = {}  # csv path -> (fingerprint, dates x ingredients DataFrame)
+_lock = threading.Lock()
+
+
+def _consumption_from_rows(df):
+    # Sales pivoted to dates x items, then one matrix product with the recipes
+    sales = df.pivot_table(index='date', columns='item_name', values='sale_units', aggfunc='sum', fill_value=0, observed=True)
+    sales.columns = sales.columns.astype(str)
+    return recipe_matrix.consumption_frame(sales.sort_index())
+
+
+def build_daily_consumption(csv_path):
+    return _consumption_from_rows(load_dataset(csv_path, copy=False))
+
+
+def daily_consumption(csv_path):
+    # Rebuilt only when the dataset fingerprint changes
+    fingerprint = dataset_fingerprint(csv_path)
+    with _lock:
+        cached = _tables.get(csv_path)
+        cache_lookup("consumption_table", cached is not None and cached[0] == fingerprint)
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+
+    with stage("consumption_table_build"):
+        table = build_daily_consumption(csv_path)
+    with _lock:
+        _tables[csv_path] = (fingerprint, table)
+    return table
+
+
+def extend_daily_consumption(csv_path, old_fingerprint, fingerprint, rows):
+    # Adds appended rows to a cached table instead of rebuilding it from the full dataset
+    with _lock:
+        cached = _tables.get(csv_path)
+    if cached is None or cached[0] != old_fingerprint:
+        return
+
+    rows = rows.assign(date=pd.to_datetime(rows['date'], format='%Y-%m-%d'))
+    table = cached[1].add(_consumption_from_rows(rows), fill_value=0).sort_index()
+    with _lock:
+        _tables[csv_path] = (fingerprint, table)
+
+
+def same_day_by_year(csv_path, target_date, years=None):
+    # Consumption on target_date's month/day for each year (all years when None)
+    table = daily_consumption(csv_path)
+    if years is None:
+        years = sorted(table.index.year.unique())
+
+    dates = []
+    for year in years:
+        try:
+            dates.append(target_date.replace(year=int(year)))
+        except ValueError:
+            # 29 February in a non-leap year
+            dates.append(pd.NaT)
+
+    # Dates outside the history come back as all-NaN rows
+    rows = table.reindex(pd.DatetimeIndex(dates))
+    rows.index = list(years)
+    return rows
@@ -0,0 +1,182 @@
+import hashlib
+import logging
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from metrics import stage, cache_lookup
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Binary sidecars (.npz) of the parsed datasets for fast cold starts
+DATASET_CACHE_DIR = os.environ.get("DATASET_CACHE_DIR", os.path.join(BASE_DIR, "dataset_cache"))
+
+_fingerprints = {}
+_digests = {}  # absolute csv path -> (size, running sha256) for hashing appends only
+_frames = {}  # absolute csv path -> (fingerprint, typed DataFrame)
+_lock = threading.Lock()
+
+
+def dataset_fingerprint(csv_path):
+    # Hash the file contents, but only re-hash when its size or mtime moved
+    stat = os.stat(csv_path)
+    key = (os.path.abspath(csv_path), stat.st_size, stat.st_mtime_ns)
+    with _lock:
+        if key in _fingerprints:
+            return _fingerprints[key]
+
+    digest = hashlib.sha256()
+    with open(csv_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    fingerprint = digest.hexdigest()[:16]
+
+    with _lock:
+        _fingerprints[key] = fingerprint
+        _digests[key[0]] = (stat.st_size, digest)
+    return fingerprint
+
+
+def _to_columnar(df):
+    # Categorical names, int32 counts and datetime64 dates
+    for col in df.columns:
+        if col == "date":
+            df[col] = pd.to_datetime(df[col], format="%Y-%m-%d")
+        elif df[col].dtype == object:
+            df[col] = df[col].astype("category")
+        elif pd.api.types.is_integer_dtype(df[col]):
+            info = np.iinfo(np.int32)
+            if df[col].min() >= info.min and df[col].max() <= info.max:
+                df[col] = df[col].astype(np.int32)
+    return df
+
+
+def _sidecar_path(csv_path):
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    path_hash = hashlib.sha256(os.path.abspath(csv_path).encode()).hexdigest()[:8]
+    return os.path.join(DATASET_CACHE_DIR, f"{name}-{path_hash}.npz")
+
+
+def _write_sidecar(path, fingerprint, df):
+    arrays = {"__fingerprint__": np.array(fingerprint), "__columns__": np.array(list(df.columns))}
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            arrays[f"c{i}_codes"] = series.cat.codes.to_numpy()
+            arrays[f"c{i}_categories"] = np.array(series.cat.categories.astype(str), dtype=str)
+        elif pd.api.types.is_datetime64_any_dtype(series):
+            arrays[f"c{i}_datetime"] = series.to_numpy().astype("datetime64[ns]")
+        else:
+            arrays[f"c{i}_values"] = series.to_numpy()
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+
+
+def _read_sidecar(path, fingerprint):
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if str(data["__fingerprint__"]) != fingerprint:
+                return None
+            columns = {}
+            for i, col in enumerate(data["__columns__"].tolist()):
+                if f"c{i}_codes" in data:
+                    columns[col] = pd.Categorical.from_codes(data[f"c{i}_codes"], data[f"c{i}_categories"])
+                elif f"c{i}_datetime" in data:
+                    columns[col] = data[f"c{i}_datetime"]
+                else:
+                    columns[col] = data[f"c{i}_values"]
+            return pd.DataFrame(columns)
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable dataset sidecar {path}: {str(e)}")
+        return None
+
+
+def load_dataset(csv_path, copy=True):
+    """Typed columnar view of a sales CSV, parsed once per file version."""
+    csv_path = os.path.abspath(csv_path)
+    fingerprint = dataset_fingerprint(csv_path)
+
+    with _lock:
+        cached = _frames.get(csv_path)
+    cache_lookup("dataset", cached is not None and cached[0] == fingerprint)
+    if cached is None or cached[0] != fingerprint:
+        sidecar = _sidecar_path(csv_path)
+        with stage("dataset_sidecar_read"):
+            df = _read_sidecar(sidecar, fingerprint)
+        cache_lookup("dataset_sidecar", df is not None)
+        if df is None:
+            logger.info(f"Parsing dataset {csv_path}")
+            with stage("csv_parse"):
+                df = _to_columnar(pd.read_csv(csv_path))
+            try:
+                _write_sidecar(sidecar, fingerprint, df)
+            except OSError as e:
+                logger.warning(f"Could not write dataset sidecar {sidecar}: {str(e)}")
+        cached = (fingerprint, df)
+        with _lock:
+            _frames[csv_path] = cached
+
+    # Callers add derived columns, so hand out copies unless told otherwise
+    return cached[1].copy() if copy else cached[1]
+
+
+def invalidate(csv_path=None):
+    with _lock:
+        if csv_path is None:
+            _frames.clear()
+        else:
+            _frames.pop(os.path.abspath(csv_path), None)
+
+
+def append_rows(csv_path, rows):
+    """Append rows to a sales CSV, extending the cached frame and fingerprint instead of re-reading it."""
+    csv_path = os.path.abspath(csv_path)
+    current = load_dataset(csv_path, copy=False)
+    old_fingerprint = dataset_fingerprint(csv_path)
+
+    data = rows[list(current.columns)].to_csv(index=False, header=False, lineterminator="\n").encode()
+    size = os.path.getsize(csv_path)
+    if size:
+        with open(csv_path, "rb") as f:
+            f.seek(size - 1)
+            if f.read(1) != b"\n":
+                data = b"\n" + data
+    with open(csv_path, "ab") as f:
+        f.write(data)
+
+    # Extend the running hash with the appended bytes; fall back to a full re-hash
+    stat = os.stat(csv_path)
+    with _lock:
+        previous = _digests.get(csv_path)
+    if previous is not None and previous[0] == size:
+        digest = previous[1].copy()
+        digest.update(data)
+        fingerprint = digest.hexdigest()[:16]
+        with _lock:
+            _fingerprints[(csv_path, stat.st_size, stat.st_mtime_ns)] = fingerprint
+            _digests[csv_path] = (stat.st_size, digest)
+    else:
+        fingerprint = dataset_fingerprint(csv_path)
+
+    # Same dtypes a fresh parse would produce; categories are rebuilt over old and new names
+    combined = pd.concat([current, _to_columnar(rows[list(current.columns)].copy())], ignore_index=True)
+    for col in current.columns:
+        if isinstance(current[col].dtype, pd.CategoricalDtype):
+            combined[col] = combined[col].astype(str).astype("category")
+    with _lock:
+        _frames[csv_path] = (fingerprint, combined)
+    try:
+        _write_sidecar(_sidecar_path(csv_path), fingerprint, combined)
+    except OSError as e:
+        logger.warning(f"Could not write dataset sidecar for {csv_path}: {str(e)}")
+
+    return old_fingerprint, fingerprint
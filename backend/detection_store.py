@@ -0,0 +1,102 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DETECTION_STORE_DIR = os.environ.get("DETECTION_STORE_DIR", os.path.join(BASE_DIR, "detection_outputs"))
+
+# Retention caps for persisted annotated images
+DETECTION_STORE_MAX_FILES = int(os.environ.get("DETECTION_STORE_MAX_FILES", 500))
+DETECTION_STORE_MAX_BYTES = int(os.environ.get("DETECTION_STORE_MAX_BYTES", 200 * 1024 * 1024))
+DETECTION_STORE_MAX_AGE_SECONDS = int(os.environ.get("DETECTION_STORE_MAX_AGE_SECONDS", 7 * 24 * 3600))
+
+# Only files this store wrote (content hash + extension) are subject to retention
+STORED_NAME = re.compile(r"^[0-9a-f]{32}\.(jpg|png|webp)$")
+
+# Response format -> (file extension, MIME type)
+IMAGE_FORMATS = {
+    "jpg": (".jpg", "image/jpeg"),
+    "jpeg": (".jpg", "image/jpeg"),
+    "png": (".png", "image/png"),
+    "webp": (".webp", "image/webp"),
+}
+
+
+def encode_image(image, fmt="jpg", quality=90):
+    # Encode in memory; quality applies to jpg/webp, png is lossless
+    import cv2
+
+    if fmt not in IMAGE_FORMATS:
+        raise ValueError(f"format must be one of {sorted(IMAGE_FORMATS)}")
+    quality = max(1, min(100, int(quality)))
+
+    ext = IMAGE_FORMATS[fmt][0]
+    if ext == ".jpg":
+        params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+    elif ext == ".webp":
+        params = [cv2.IMWRITE_WEBP_QUALITY, quality]
+    else:
+        params = [cv2.IMWRITE_PNG_COMPRESSION, 3]
+
+    ok, buffer = cv2.imencode(ext, image, params)
+    if not ok:
+        raise ValueError(f"Could not encode image as {fmt}")
+    return buffer.tobytes()
+
+
+class DetectionStore:
+    def __init__(self, directory=DETECTION_STORE_DIR, max_files=DETECTION_STORE_MAX_FILES,
+                 max_bytes=DETECTION_STORE_MAX_BYTES, max_age_seconds=DETECTION_STORE_MAX_AGE_SECONDS):
+        self.directory = directory
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+
+    def save(self, data, fmt="jpg"):
+        # Content-addressed, so identical annotations share a file and names never collide
+        ext = IMAGE_FORMATS[fmt][0]
+        path = os.path.join(self.directory, f"{hashlib.sha256(data).hexdigest()[:32]}{ext}")
+
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            if os.path.exists(path):
+                os.utime(path)
+            else:
+                tmp_path = path + ".tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            self._enforce_retention()
+        return path
+
+    def _enforce_retention(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if STORED_NAME.match(name) and os.path.isfile(path):
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        # Oldest first: drop expired files, then trim to the count and size caps
+        entries.sort()
+        cutoff = time.time() - self.max_age_seconds
+        total_bytes = sum(size for _, size, _ in entries)
+        while entries and (
+            entries[0][0] < cutoff or len(entries) > self.max_files or total_bytes > self.max_bytes
+        ):
+            _, size, path = entries.pop(0)
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning(f"Could not remove {path}: {str(e)}")
+            total_bytes -= size
+
+
+store = DetectionStore()
@@ -0,0 +1,195 @@
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from metrics import stage, DETECTOR_INFERENCES
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DETECTOR_MODEL_PATH = os.environ.get("DETECTOR_MODEL_PATH", os.path.join(BASE_DIR, "workflow1", "best.pt"))
+
+# Load and warm the detector in the background when the app starts
+DETECTOR_WARMUP = os.environ.get("DETECTOR_WARMUP", "true").lower() == "true"
+
+# Side of the blank frame used for the warmup inference
+DETECTOR_WARMUP_SIZE = int(os.environ.get("DETECTOR_WARMUP_SIZE", 640))
+
+# Default inference size and images per forward pass for batch detection
+DETECTOR_IMGSZ = int(os.environ.get("DETECTOR_IMGSZ", 640))
+DETECTOR_BATCH_SIZE = int(os.environ.get("DETECTOR_BATCH_SIZE", 8))
+
+# Inference backend: "torch" (ultralytics eager) or "onnx" (exported, onnxruntime on CPU)
+DETECTOR_BACKEND = os.environ.get("DETECTOR_BACKEND", "torch").lower()
+
+# Dynamic int8 quantization of the ONNX export, and onnxruntime intra-op threads
+DETECTOR_ONNX_INT8 = os.environ.get("DETECTOR_ONNX_INT8", "false").lower() == "true"
+DETECTOR_ONNX_THREADS = int(os.environ.get("DETECTOR_ONNX_THREADS", 0)) or None
+
+
+class TorchBackend:
+    def __init__(self, model_path):
+        from ultralytics import YOLO
+        self.model = YOLO(model_path)
+
+    def __call__(self, images, **kwargs):
+        return [extract_detections(result) for result in self.model(images, **kwargs)]
+
+
+def load_backend(name, model_path):
+    if name == "torch":
+        return TorchBackend(model_path)
+    if name == "onnx":
+        from onnx_detector import OnnxBackend
+        return OnnxBackend(model_path, imgsz=DETECTOR_IMGSZ, int8=DETECTOR_ONNX_INT8, threads=DETECTOR_ONNX_THREADS)
+    raise ValueError(f"Unknown detector backend: {name}")
+
+
+class Detector:
+    def __init__(self, model_path=DETECTOR_MODEL_PATH, backend=DETECTOR_BACKEND):
+        self.model_path = model_path
+        self.backend = backend
+        self.state = "not_loaded"  # not_loaded, loading, loaded, ready, missing, error
+        self.error = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self._model = None
+        self._load_lock = threading.Lock()
+        # Predictors and sessions keep per-call state, so inferences are serialized
+        self._infer_lock = threading.Lock()
+
+    def _load(self):
+        if self._model is not None:
+            return self._model
+
+        with self._load_lock:
+            if self._model is not None:
+                return self._model
+
+            if not os.path.exists(self.model_path):
+                self.state = "missing"
+                raise FileNotFoundError("YOLO model not found")
+
+            self.state = "loading"
+            start = time.perf_counter()
+            try:
+                model = load_backend(self.backend, self.model_path)
+            except Exception as e:
+                self.state = "error"
+                self.error = str(e)
+                raise
+            self.load_seconds = time.perf_counter() - start
+            self._model = model
+            self.state = "loaded"
+            logger.info(f"Loaded {self.backend} detector from {self.model_path} in {self.load_seconds:.2f}s")
+            return model
+
+    def warmup(self):
+        model = self._load()
+        # The first inference builds the predictor and fuses layers
+        frame = np.zeros((DETECTOR_WARMUP_SIZE, DETECTOR_WARMUP_SIZE, 3), dtype=np.uint8)
+        start = time.perf_counter()
+        with self._infer_lock:
+            model([frame], verbose=False)
+        self.warmup_seconds = time.perf_counter() - start
+        self.state = "ready"
+        logger.info(f"Detector warmup took {self.warmup_seconds:.2f}s")
+
+    def warmup_async(self):
+        def run():
+            try:
+                self.warmup()
+            except Exception as e:
+                logger.warning(f"Detector warmup failed: {str(e)}")
+
+        threading.Thread(target=run, name="detector-warmup", daemon=True).start()
+
+    def available(self):
+        return os.path.exists(self.model_path)
+
+    @property
+    def fixed_imgsz(self):
+        # ONNX exports take one input size; the torch backend resizes per call
+        return DETECTOR_IMGSZ if self.backend == "onnx" else None
+
+    def predict(self, images, **kwargs):
+        # One list of detections per image, whichever backend runs them
+        if isinstance(images, np.ndarray):
+            images = [images]
+        model = self._load()
+        with self._infer_lock, stage("detector_inference"):
+            results = model(images, **kwargs)
+        DETECTOR_INFERENCES.inc(len(images), backend=self.backend)
+        if self.state == "loaded":
+            self.state = "ready"
+        return results
+
+    def predict_batch(self, images, imgsz=DETECTOR_IMGSZ, batch_size=DETECTOR_BATCH_SIZE):
+        # Chunked so a large upload does not build one huge input tensor
+        results = []
+        for start in range(0, len(images), batch_size):
+            chunk = images[start:start + batch_size]
+            results.extend(self.predict(chunk, imgsz=imgsz, verbose=False))
+        return results
+
+    def status(self):
+        return {
+            "state": self.state,
+            "backend": self.backend,
+            "model_path": self.model_path,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "error": self.error,
+        }
+
+
+def extract_detections(result):
+    # One dict per box: class name, confidence and pixel coordinates
+    detections = []
+    for box in result.boxes:
+        x1, y1, x2, y2 = (int(v) for v in box.xyxy[0].cpu().numpy())
+        class_id = int(box.cls[0])
+        detections.append({
+            "class_name": result.names[class_id],
+            "confidence": float(box.conf[0]),
+            "box": [x1, y1, x2, y2],
+        })
+    return detections
+
+
+def count_items(detections, item_counts=None):
+    item_counts = {} if item_counts is None else item_counts
+    for detection in detections:
+        item_counts[detection["class_name"]] = item_counts.get(detection["class_name"], 0) + 1
+    return item_counts
+
+
+def annotate_image(image, detections):
+    import cv2
+
+    annotated_image = image.copy()
+    for detection in detections:
+        x1, y1, x2, y2 = detection["box"]
+        # Draw bounding box
+        cv2.rectangle(annotated_image, (x1, y1), (x2, y2), (0, 255, 0), 2)
+        # Add label
+        label = f"{detection['class_name']} {detection['confidence']:.2f}"
+        cv2.putText(annotated_image, label, (x1, y1 - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+    return annotated_image
+
+
+def decode_image(data):
+    import cv2
+
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Could not decode image")
+    return image
+
+
+detector = Detector()
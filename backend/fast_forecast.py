@@ -0,0 +1,160 @@
+import logging
+import threading
+
+import numpy as np
+import pandas as pd
+
+from dataset_service import dataset_fingerprint
+from model_registry import load_histories
+from metrics import stage, cache_lookup, MODEL_FITS
+
+logger = logging.getLogger(__name__)
+
+# Seasonal Fourier orders, as Prophet uses by default
+WEEKLY_ORDER = 3
+YEARLY_ORDER = 10
+
+# Piecewise-linear trend: hinge count, share of history they span, and their ridge penalty
+N_CHANGEPOINTS = 25
+CHANGEPOINT_RANGE = 0.8
+CHANGEPOINT_PENALTY = 1.0
+
+# Small ridge on every coefficient, so items with fewer rows than features still solve
+COEFFICIENT_PENALTY = 1e-3
+
+# Items need at least this many observations to be fitted, as Prophet does
+MIN_HISTORY_ROWS = 2
+
+# Intervals cover the same 80% band as Prophet's default interval_width
+INTERVAL_Z = 1.2816
+
+_models = {}  # csv path -> FastForecastModel
+_lock = threading.Lock()
+
+
+def _fourier(days, period, order):
+    angles = 2 * np.pi * np.outer(days / period, np.arange(1, order + 1))
+    return np.hstack([np.sin(angles), np.cos(angles)])
+
+
+class FastForecastModel:
+    """Trend plus weekly/yearly Fourier regression, fitted for all items in one solve."""
+
+    def __init__(self, fingerprint, items, start, span_days, changepoints, weekly, yearly_order,
+                 coefficients, y_scale, sigma, failed_items=None):
+        self.fingerprint = fingerprint
+        self.items = items
+        self.failed_items = failed_items or {}  # item -> reason it was left out
+        self.start = start
+        self.span_days = span_days
+        self.changepoints = changepoints  # scaled time of each trend hinge
+        self.weekly = weekly
+        self.yearly_order = yearly_order
+        self.coefficients = coefficients  # features x items, in scaled units
+        self.y_scale = y_scale
+        self.sigma = sigma  # residual std per item
+
+    def design(self, dates):
+        dates = pd.DatetimeIndex(dates)
+        epoch_days = (dates - pd.Timestamp("1970-01-01")).total_seconds().to_numpy() / 86400
+        t = ((dates - self.start).total_seconds().to_numpy() / 86400) / self.span_days
+        columns = [np.ones(len(t)), t, np.clip(t[:, None] - self.changepoints[None, :], 0, None)]
+        if self.yearly_order:
+            columns.append(_fourier(epoch_days, 365.25, self.yearly_order))
+        if self.weekly:
+            columns.append(_fourier(epoch_days, 7, WEEKLY_ORDER))
+        return np.column_stack(columns)
+
+    def predict_item_sales(self, dates):
+        # Same dates x items frame as forecasting.predict_item_sales, one product for every item
+        values = self.design(dates) @ self.coefficients * self.y_scale
+        return pd.DataFrame(values, index=pd.DatetimeIndex(dates, name='date'), columns=self.items)
+
+    def predict(self, dates, item):
+        # Per-item frame with Prophet's ds / yhat / yhat_lower / yhat_upper columns
+        k = self.items.index(item)
+        yhat = self.design(dates) @ self.coefficients[:, k] * self.y_scale[k]
+        band = INTERVAL_Z * self.sigma[k]
+        return pd.DataFrame({
+            "ds": pd.DatetimeIndex(dates),
+            "yhat": yhat,
+            "yhat_lower": yhat - band,
+            "yhat_upper": yhat + band,
+        })
+
+
+def fit_fast_model(histories, fingerprint=None):
+    # histories: {item: (ds, y) frame}, aligned into one dates x items matrix
+    series = {item: history.dropna(subset=["y"]).groupby("ds")["y"].mean() for item, history in histories.items()}
+    failed_items = {
+        item: f"Not enough history ({len(values)} rows, need {MIN_HISTORY_ROWS})"
+        for item, values in series.items() if len(values) < MIN_HISTORY_ROWS
+    }
+    items = [item for item in series if item not in failed_items]
+    if not items:
+        raise ValueError("No item has enough history to fit")
+    table = pd.concat({item: series[item] for item in items}, axis=1).sort_index()
+    dates = table.index
+
+    start = dates[0]
+    span_days = max((dates[-1] - start).total_seconds() / 86400, 1.0)
+    spacing_days = np.median(np.diff(dates.as_unit("ns").asi8)) / 86400e9 if len(dates) > 1 else 1.0
+
+    # Weekly terms only for sub-weekly data; monthly data cannot resolve high yearly orders
+    weekly = spacing_days < 7
+    yearly_order = 0
+    if span_days >= 2 * 365:
+        per_year = 365.25 / spacing_days
+        yearly_order = int(min(YEARLY_ORDER, max(1, (per_year - 1) // 2)))
+    changepoints = np.linspace(0, CHANGEPOINT_RANGE, N_CHANGEPOINTS + 1)[1:]
+
+    model = FastForecastModel(fingerprint, items, start, span_days, changepoints, weekly, yearly_order,
+                              None, None, None, failed_items)
+    X = model.design(dates)
+
+    # Scale each item by its max |y| like Prophet, so one penalty fits all items
+    Y = table.to_numpy(dtype=float)
+    y_scale = np.nanmax(np.abs(Y), axis=0)
+    y_scale[~np.isfinite(y_scale) | (y_scale == 0)] = 1.0
+    Y = Y / y_scale
+
+    # Stronger ridge on the trend hinges, standing in for Prophet's sparse changepoint prior
+    penalty = np.full(X.shape[1], COEFFICIENT_PENALTY)
+    penalty[2:2 + len(changepoints)] = CHANGEPOINT_PENALTY
+    penalty = np.diag(penalty)
+
+    observed = ~np.isnan(Y)
+    if observed.all():
+        # Aligned histories: one batched solve for every item
+        coefficients = np.linalg.solve(X.T @ X + penalty, X.T @ Y)
+    else:
+        coefficients = np.empty((X.shape[1], len(items)))
+        for k in range(len(items)):
+            rows = observed[:, k]
+            Xk = X[rows]
+            coefficients[:, k] = np.linalg.solve(Xk.T @ Xk + penalty, Xk.T @ Y[rows, k])
+
+    residuals = np.where(observed, Y - X @ coefficients, np.nan) * y_scale
+    sigma = np.sqrt(np.nanmean(residuals ** 2, axis=0))
+
+    model.coefficients = coefficients
+    model.y_scale = y_scale
+    model.sigma = sigma
+    return model
+
+
+def get_fast_model(csv_path):
+    # Refit only when the dataset fingerprint changes; a fit takes milliseconds
+    fingerprint = dataset_fingerprint(csv_path)
+    with _lock:
+        model = _models.get(str(csv_path))
+        cache_lookup("fast_model", model is not None and model.fingerprint == fingerprint)
+        if model is not None and model.fingerprint == fingerprint:
+            return model
+
+        logger.info(f"Fitting fast forecast model for {csv_path}")
+        with stage("fast_model_fit"):
+            model = fit_fast_model(load_histories(csv_path), fingerprint)
+        MODEL_FITS.inc(model="fast", result="ok")
+        _models[str(csv_path)] = model
+        return model
@@ -0,0 +1,132 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+# Number of processes fitting per-item models in parallel
+FORECAST_WORKERS = int(os.environ.get("FORECAST_WORKERS", os.cpu_count() or 1))
+
+# Stan/BLAS threads each worker may use, so workers x threads <= cores
+FORECAST_THREADS_PER_WORKER = int(os.environ.get("FORECAST_THREADS_PER_WORKER", 1))
+
+# Workers start from a clean single-threaded process rather than a fork of the API process,
+# whose job, scheduler and warm-up threads may hold locks (logging, registry) at fork time
+FORECAST_START_METHOD = os.environ.get(
+    "FORECAST_START_METHOD", "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "STAN_NUM_THREADS",
+)
+
+_thread_limits = None
+
+
+def _init_worker(threads):
+    global _thread_limits
+    # CmdStan runs as a child process and picks these up from the environment
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+
+    # numpy may already be imported by the time this runs, so cap its pools directly
+    try:
+        from threadpoolctl import threadpool_limits
+        _thread_limits = threadpool_limits(limits=threads)
+    except ImportError:
+        pass
+
+
+def _fit_item(history, init=None):
+    from prophet.serialize import model_to_json
+    from model_registry import fit_prophet
+
+    return model_to_json(fit_prophet(history, init=init))
+
+
+class ForecastExecutor:
+    def __init__(self, workers=FORECAST_WORKERS, threads_per_worker=FORECAST_THREADS_PER_WORKER):
+        self.workers = max(1, workers)
+        self.threads_per_worker = max(1, threads_per_worker)
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                context = multiprocessing.get_context(FORECAST_START_METHOD)
+                if FORECAST_START_METHOD == "forkserver":
+                    # The fork server only needs this module, not the app that started it
+                    context.set_forkserver_preload(["forecast_executor"])
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=context,
+                    initializer=_init_worker,
+                    initargs=(self.threads_per_worker,),
+                )
+            return self._pool
+
+    def _reset_pool(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def fit_items(self, histories, on_item=None, inits=None):
+        """Fit one model per item; returns ({item: model JSON}, {item: error})."""
+        fitted = {}
+        errors = {}
+        # inits: {item: Stan parameters} to warm-start those fits from
+        inits = inits or {}
+        # on_item(item, error) runs as each fit finishes; raising from it stops the batch
+        on_item = on_item or (lambda item, error: None)
+
+        # A pool is not worth spinning up for a single fit
+        if self.workers == 1 or len(histories) <= 1:
+            for item, history in histories.items():
+                try:
+                    fitted[item] = _fit_item(history, inits.get(item))
+                except Exception as e:
+                    logger.error(f"Error fitting model for {item}: {str(e)}")
+                    errors[item] = str(e)
+                on_item(item, errors.get(item))
+            return fitted, errors
+
+        pool = self._get_pool()
+        futures = {
+            pool.submit(_fit_item, history, inits.get(item)): item for item, history in histories.items()
+        }
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                fitted[item] = future.result()
+            except BrokenProcessPool as e:
+                # A worker died (e.g. OOM); report the item and start a fresh pool next time
+                logger.error(f"Forecast worker died while fitting {item}: {str(e)}")
+                errors[item] = "Forecast worker process terminated unexpectedly"
+                self._reset_pool()
+            except Exception as e:
+                logger.error(f"Error fitting model for {item}: {str(e)}")
+                errors[item] = str(e)
+            try:
+                on_item(item, errors.get(item))
+            except Exception:
+                for pending in futures:
+                    pending.cancel()
+                raise
+
+        return fitted, errors
+
+    def shutdown(self):
+        self._reset_pool()
+
+
+executor = ForecastExecutor()
@@ -0,0 +1,145 @@
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from dataset_service import dataset_fingerprint
+from forecasting import predict_item_sales
+from model_registry import registry, DATASETS
+from recipes import recipe_matrix
+from metrics import cache_lookup
+
+logger = logging.getLogger(__name__)
+
+# Days from today that are precomputed after every data refresh
+FORECAST_HORIZON_DAYS = int(os.environ.get("FORECAST_HORIZON_DAYS", 14))
+
+# How often (seconds) the scheduler checks for new data or a new day
+FORECAST_REFRESH_SECONDS = int(os.environ.get("FORECAST_REFRESH_SECONDS", 300))
+
+# Run the background materialization when the app starts
+FORECAST_SCHEDULER = os.environ.get("FORECAST_SCHEDULER", "true").lower() == "true"
+
+
+class MaterializedForecast:
+    def __init__(self, fingerprint, sales, consumption, failed_items):
+        self.fingerprint = fingerprint
+        self.sales = sales  # dates x items
+        self.consumption = consumption  # dates x ingredients
+        self.failed_items = failed_items
+        self.built_at = time.time()
+
+    def covers(self, dates):
+        return self.consumption.index.get_indexer(dates) >= 0
+
+
+class ForecastScheduler:
+    def __init__(self, csv_path, horizon_days=FORECAST_HORIZON_DAYS, refresh_seconds=FORECAST_REFRESH_SECONDS):
+        self.csv_path = csv_path
+        self.horizon_days = horizon_days
+        self.refresh_seconds = refresh_seconds
+        self.table = None
+        self.last_error = None
+        self.hits = 0
+        self.misses = 0
+        self._refresh_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def horizon(self):
+        start = pd.Timestamp.today().normalize()
+        return pd.date_range(start, periods=self.horizon_days, freq='D', name='date')
+
+    def _compute(self, dates):
+        # Fitted models come from the registry and are only refit when the CSV changes
+        models, failed_items = registry.get_models(self.csv_path)
+        sales = predict_item_sales(models, dates)
+        return sales, recipe_matrix.consumption_frame(sales), failed_items
+
+    def _is_current(self, table):
+        return bool(
+            table is not None
+            and table.fingerprint == dataset_fingerprint(self.csv_path)
+            and table.covers(self.horizon()).all()
+        )
+
+    def refresh(self, force=False):
+        # Rebuilds the table when the dataset changed or the horizon moved to a new day
+        with self._refresh_lock:
+            if not force and self._is_current(self.table):
+                return False
+            start = time.perf_counter()
+            fingerprint = dataset_fingerprint(self.csv_path)
+            sales, consumption, failed_items = self._compute(self.horizon())
+            self.table = MaterializedForecast(fingerprint, sales, consumption, failed_items)
+            self.last_error = None
+            logger.info(
+                f"Materialized {len(consumption)} forecast days for {self.csv_path} "
+                f"in {time.perf_counter() - start:.2f}s"
+            )
+            return True
+
+    def consumption(self, dates):
+        """dates x ingredients consumption and failed items, from the table where possible."""
+        dates = pd.DatetimeIndex(dates, name='date')
+        table = self.table
+        if table is not None and table.fingerprint != dataset_fingerprint(self.csv_path):
+            # Stale after a data refresh: rebuild in the background, answer on demand meanwhile
+            table = None
+            self.notify()
+
+        covered = table.covers(dates) if table is not None else np.zeros(len(dates), dtype=bool)
+        cache_lookup("forecast_table", covered.all())
+        if covered.all():
+            self.hits += 1
+            return table.consumption.loc[dates], table.failed_items
+
+        # Dates outside the horizon are computed on demand and merged in request order
+        self.misses += 1
+        _, computed, failed_items = self._compute(dates[~covered])
+        if covered.any():
+            computed = pd.concat([table.consumption.loc[dates[covered]], computed])
+            failed_items = {**table.failed_items, **failed_items}
+        return computed.reindex(dates), failed_items
+
+    def notify(self):
+        # Wake the background loop early, e.g. after new sales data arrived
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                self.last_error = str(e)
+                logger.warning(f"Forecast materialization failed: {str(e)}")
+            self._wake.wait(self.refresh_seconds)
+            self._wake.clear()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="forecast-scheduler", daemon=True)
+            self._thread.start()
+
+    def status(self):
+        table = self.table
+        dates = table.consumption.index if table is not None else []
+        return {
+            "dataset": self.csv_path,
+            "horizon_days": self.horizon_days,
+            "running": self._thread is not None,
+            "fingerprint": table.fingerprint if table is not None else None,
+            "start_date": dates[0].strftime('%Y-%m-%d') if len(dates) else None,
+            "end_date": dates[-1].strftime('%Y-%m-%d') if len(dates) else None,
+            "built_at": table.built_at if table is not None else None,
+            "current": self._is_current(table),
+            "hits": self.hits,
+            "misses": self.misses,
+            "last_error": self.last_error,
+        }
+
+
+forecast_scheduler = ForecastScheduler(DATASETS["realistic"])
@@ -0,0 +1,68 @@
+import pandas as pd
+
+# Upper bound on dates per batch request (one year of daily plans)
+MAX_BATCH_DATES = 366
+
+# "prophet": per-item Prophet models; "fast": batched trend + Fourier regression;
+# "blend": Prophet blended with the global boosted short-term model
+FORECAST_ENGINES = ("prophet", "fast", "blend")
+
+
+def parse_forecast_dates(data):
+    # Accept either {"dates": [...]} or {"start_date": ..., "end_date": ...}
+    if data.get('dates'):
+        if not isinstance(data['dates'], list):
+            raise ValueError("dates must be a list of YYYY-MM-DD strings")
+        dates = pd.DatetimeIndex(pd.to_datetime(data['dates'], format='%Y-%m-%d'))
+        dates = dates.drop_duplicates().sort_values()
+    elif data.get('start_date') and data.get('end_date'):
+        start = pd.to_datetime(data['start_date'], format='%Y-%m-%d')
+        end = pd.to_datetime(data['end_date'], format='%Y-%m-%d')
+        if end < start:
+            raise ValueError("end_date must not be before start_date")
+        dates = pd.date_range(start, end, freq='D')
+    else:
+        raise ValueError("Provide either 'dates' or 'start_date' and 'end_date' in YYYY-MM-DD format")
+
+    if len(dates) > MAX_BATCH_DATES:
+        raise ValueError(f"At most {MAX_BATCH_DATES} dates can be forecast per request")
+    return dates
+
+
+def parse_forecast_engine(data):
+    engine = (data.get('engine') or 'prophet').lower()
+    if engine not in FORECAST_ENGINES:
+        raise ValueError(f"engine must be one of {list(FORECAST_ENGINES)}")
+    return engine
+
+
+def parse_blend_weight(data, default):
+    try:
+        weight = float(data.get('blend_weight', default))
+    except (TypeError, ValueError):
+        raise ValueError("blend_weight must be a number between 0 and 1")
+    if not 0 <= weight <= 1:
+        raise ValueError("blend_weight must be between 0 and 1")
+    return weight
+
+
+def parse_compare_years(data):
+    # "all" -> None (every year in the history), otherwise a non-empty list of integer years
+    years = data.get('years')
+    if years == "all":
+        return None
+    if (not isinstance(years, list) or not years
+            or not all(isinstance(year, int) and not isinstance(year, bool) for year in years)):
+        raise ValueError("years must be \"all\" or a non-empty list of integer years")
+    return years
+
+
+def predict_item_sales(models, dates):
+    # One vectorized predict per item covering every requested date
+    future_df = pd.DataFrame({'ds': dates})
+    sales = {}
+    for item, model in models.items():
+        forecast = model.predict(future_df)
+        sales[item] = forecast['yhat'].to_numpy()
+    return pd.DataFrame(sales, index=pd.DatetimeIndex(dates, name='date'))
+
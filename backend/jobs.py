@@ -0,0 +1,201 @@
+import contextvars
+import importlib
+import inspect
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Long-lived workers running workflow jobs inside the API process
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))
+
+# Finished jobs are kept this long (seconds) for result polling
+JOB_RETENTION_SECONDS = int(os.environ.get("JOB_RETENTION_SECONDS", 3600))
+
+# Progress events kept per job for late event-stream subscribers
+JOB_MAX_EVENTS = int(os.environ.get("JOB_MAX_EVENTS", 1000))
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, workflow, params):
+        self.id = uuid.uuid4().hex
+        self.workflow = workflow
+        self.params = params
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.stage = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+        self.cancel_requested = threading.Event()
+        self.done = threading.Event()
+        # Ordered event log; subscribers block on the condition instead of polling
+        self.events = []
+        self.events_dropped = 0
+        self._events_changed = threading.Condition()
+        self.emit("status", status=self.status)
+
+    def emit(self, event, **data):
+        with self._events_changed:
+            seq = self.events_dropped + len(self.events)
+            self.events.append({"id": seq, "event": event, "time": time.time(), **data})
+            # Per-item events can be numerous; the oldest are dropped, never the latest
+            if len(self.events) > JOB_MAX_EVENTS:
+                del self.events[0]
+                self.events_dropped += 1
+            self._events_changed.notify_all()
+
+    def events_since(self, next_id, timeout=None):
+        # Blocks until events with id >= next_id exist, the job ends, or timeout
+        with self._events_changed:
+            self._events_changed.wait_for(
+                lambda: self.events_dropped + len(self.events) > next_id or self.done.is_set(), timeout
+            )
+            start = max(0, next_id - self.events_dropped)
+            return self.events[start:]
+
+    def progress(self, stage, **info):
+        # Workflows call this between stages; it doubles as the cancellation point
+        if self.cancel_requested.is_set():
+            raise JobCancelled()
+        self.stage = stage
+        self.emit("progress", stage=stage, **info)
+
+    def to_dict(self, include_result=True):
+        data = {
+            "job_id": self.id,
+            "workflow": self.workflow,
+            "params": self.params,
+            "status": self.status,
+            "stage": self.stage,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if include_result:
+            data["result"] = self.result
+            data["error"] = self.error
+        return data
+
+
+class JobManager:
+    def __init__(self, workers=JOB_WORKERS):
+        self._workflows = {}
+        self._private = set()
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+
+    def register(self, name, func, public=True):
+        # func(progress=..., **params) -> JSON-serializable result, or "module:function"
+        # to defer importing the workflow (and its libraries) until the first job.
+        # Private workflows are only submitted by their own endpoints, never through /api/jobs
+        self._workflows[name] = func
+        if not public:
+            self._private.add(name)
+
+    def _workflow(self, name):
+        func = self._workflows[name]
+        if isinstance(func, str):
+            module, _, attribute = func.partition(":")
+            func = getattr(importlib.import_module(module), attribute)
+            self._workflows[name] = func
+        return func
+
+    @property
+    def workflows(self):
+        # Workflows the generic job API may run
+        return sorted(name for name in self._workflows if name not in self._private)
+
+    def is_private(self, job):
+        return job.workflow in self._private
+
+    def submit(self, workflow, params=None):
+        if workflow not in self._workflows:
+            raise KeyError(f"Unknown workflow: {workflow}")
+        try:
+            inspect.signature(self._workflow(workflow)).bind(progress=None, **(params or {}))
+        except TypeError as e:
+            raise ValueError(f"Invalid parameters for {workflow}: {str(e)}")
+
+        self._prune()
+        job = Job(workflow, params or {})
+        with self._lock:
+            self._jobs[job.id] = job
+        # The worker runs in the caller's context, so stage timings reach the request that waits on it
+        job.future = self._pool.submit(contextvars.copy_context().run, self._run, job)
+        return job
+
+    def _run(self, job):
+        if job.cancel_requested.is_set():
+            return self._finish(job, "cancelled")
+
+        job.status = "running"
+        job.started_at = time.time()
+        job.emit("status", status=job.status)
+        try:
+            result = self._workflow(job.workflow)(progress=job.progress, **job.params)
+            if job.cancel_requested.is_set():
+                return self._finish(job, "cancelled")
+            job.result = result
+            self._finish(job, "succeeded")
+        except JobCancelled:
+            self._finish(job, "cancelled")
+        except Exception as e:
+            logger.exception(f"Job {job.id} ({job.workflow}) failed")
+            job.error = str(e)
+            self._finish(job, "failed")
+
+    def _finish(self, job, status):
+        job.status = status
+        job.finished_at = time.time()
+        job.emit("done", status=status, result=job.result, error=job.error)
+        job.done.set()
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is None:
+            return None
+        if job.done.is_set():
+            return job
+
+        job.cancel_requested.set()
+        # Queued jobs never start; running ones stop at their next progress() call
+        if job.future is not None and job.future.cancel():
+            self._finish(job, "cancelled")
+        return job
+
+    def wait(self, job, timeout):
+        return job.done.wait(timeout)
+
+    def _prune(self):
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.finished_at is not None and job.finished_at < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+
+job_manager = JobManager()
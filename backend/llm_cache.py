@@ -0,0 +1,228 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+from metrics import stage, cache_lookup, LLM_CALLS
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# "gemini" calls the API; "stub" answers locally for offline runs
+LLM_BACKEND = os.environ.get("LLM_BACKEND", "gemini").lower()
+LLM_MODEL = os.environ.get("LLM_MODEL", "gemini-2.0-flash")
+
+# Optional JSON file the stub backend answers with
+LLM_STUB_RESPONSE = os.environ.get("LLM_STUB_RESPONSE")
+
+# Disk cache of validated responses
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_DIR = os.environ.get("LLM_CACHE_DIR", os.path.join(BASE_DIR, "llm_cache"))
+LLM_CACHE_TTL_SECONDS = int(os.environ.get("LLM_CACHE_TTL_SECONDS", 24 * 3600))
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", 1000))
+LLM_CACHE_MAX_BYTES = int(os.environ.get("LLM_CACHE_MAX_BYTES", 50 * 1024 * 1024))
+
+# Striped locks serialising identical prompts; a fixed pool so memory stays bounded
+LLM_KEY_LOCKS = 64
+
+ENTRY_NAME = re.compile(r"^[0-9a-f]{64}\.json$")
+
+
+def normalize_prompt(prompt):
+    # Indentation and blank lines from the triple-quoted templates do not change the answer
+    return " ".join(prompt.split())
+
+
+def parse_json_response(text):
+    # Models sometimes wrap the JSON in a ```json fence
+    if "```json" in text:
+        text = text.split("```json")[1].split("```")[0]
+    elif text.strip().startswith("```"):
+        text = text.strip().strip("`")
+    return json.loads(text.strip())
+
+
+class GeminiBackend:
+    name = "gemini"
+
+    def __init__(self):
+        import google.generativeai as genai
+
+        # Configure Gemini API key
+        genai.configure(api_key=os.environ.get("GEMINI_API_KEY", "gemini_api"))
+        self._genai = genai
+
+    def generate(self, prompt, model):
+        return self._genai.GenerativeModel(model).generate_content(prompt).text
+
+
+class StubBackend:
+    name = "stub"
+
+    def generate(self, prompt, model):
+        # Deterministic answer so workflows and the cache can run without network
+        if LLM_STUB_RESPONSE:
+            with open(LLM_STUB_RESPONSE) as f:
+                return f.read()
+        digest = hashlib.sha256(normalize_prompt(prompt).encode()).hexdigest()
+        return json.dumps({"stub": True, "model": model, "prompt_sha256": digest})
+
+
+BACKENDS = {
+    "gemini": GeminiBackend,
+    "stub": StubBackend,
+}
+
+
+def register_backend(name, factory):
+    # factory() -> object with generate(prompt, model) -> response text
+    BACKENDS[name] = factory
+
+
+class LLMCache:
+    def __init__(self, backend=LLM_BACKEND, directory=LLM_CACHE_DIR, ttl_seconds=LLM_CACHE_TTL_SECONDS,
+                 max_entries=LLM_CACHE_MAX_ENTRIES, max_bytes=LLM_CACHE_MAX_BYTES, enabled=LLM_CACHE_ENABLED):
+        self.backend_name = backend
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._backend = None
+        self._lock = threading.Lock()
+        self._key_locks = [threading.Lock() for _ in range(LLM_KEY_LOCKS)]
+
+    @property
+    def backend(self):
+        # Created on first use so importing a workflow never touches the network client
+        with self._lock:
+            if self._backend is None:
+                if self.backend_name not in BACKENDS:
+                    raise ValueError(f"Unknown LLM backend: {self.backend_name}")
+                self._backend = BACKENDS[self.backend_name]()
+            return self._backend
+
+    def key(self, prompt, model):
+        payload = f"{self.backend_name}\n{model}\n{normalize_prompt(prompt)}"
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _read(self, key):
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry.get("created_at", 0) > self.ttl_seconds:
+            self._remove(path)
+            return None
+        return entry
+
+    def _write(self, key, model, text):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"model": model, "backend": self.backend_name, "created_at": time.time(), "text": text}, f)
+        os.replace(tmp_path, path)
+        self._enforce_limits()
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _entries(self):
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for name in os.listdir(self.directory):
+            if ENTRY_NAME.match(name):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return sorted(entries)
+
+    def _enforce_limits(self):
+        # Oldest first: drop expired entries, then trim to the count and size caps
+        entries = self._entries()
+        cutoff = time.time() - self.ttl_seconds
+        total_bytes = sum(size for _, size, _ in entries)
+        while entries and (
+            entries[0][0] < cutoff or len(entries) > self.max_entries or total_bytes > self.max_bytes
+        ):
+            _, size, path = entries.pop(0)
+            self._remove(path)
+            total_bytes -= size
+
+    def _key_lock(self, key):
+        # Different prompts may share a stripe; they then only wait on each other's calls
+        return self._key_locks[hash(key) % len(self._key_locks)]
+
+    def _generate(self, prompt, model):
+        try:
+            with stage("llm_call"):
+                text = self.backend.generate(prompt, model)
+        except Exception:
+            LLM_CALLS.inc(backend=self.backend_name, result="error")
+            raise
+        LLM_CALLS.inc(backend=self.backend_name, result="ok")
+        return text
+
+    def generate_json(self, prompt, model=LLM_MODEL):
+        """Parsed JSON answer for a prompt and whether it came from the cache."""
+        if not self.enabled:
+            return parse_json_response(self._generate(prompt, model)), False
+
+        key = self.key(prompt, model)
+        # Identical concurrent prompts share one upstream call
+        with self._key_lock(key):
+            entry = self._read(key)
+            cache_lookup("llm", entry is not None)
+            if entry is not None:
+                self.hits += 1
+                return parse_json_response(entry["text"]), True
+
+            self.misses += 1
+            text = self._generate(prompt, model)
+            # Raises on non-JSON answers, which are therefore never cached
+            value = parse_json_response(text)
+            try:
+                self._write(key, model, text)
+            except OSError as e:
+                logger.warning(f"Could not write LLM cache entry: {str(e)}")
+            return value, False
+
+    def stats(self):
+        entries = self._entries()
+        return {
+            "backend": self.backend_name,
+            "enabled": self.enabled,
+            "entries": len(entries),
+            "size_bytes": sum(size for _, size, _ in entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+    def clear(self):
+        entries = self._entries()
+        for _, _, path in entries:
+            self._remove(path)
+        return len(entries)
+
+
+llm_cache = LLMCache()
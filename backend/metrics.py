@@ -0,0 +1,204 @@
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Record stage timings and counters; /metrics still answers (empty) when disabled
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() == "true"
+
+# Send the Server-Timing breakdown on every response instead of only on request
+SERVER_TIMING_ALWAYS = os.environ.get("SERVER_TIMING_ALWAYS", "false").lower() == "true"
+
+# Request header (or ?timing=true) that opts one request into the Server-Timing breakdown
+SERVER_TIMING_HEADER = "X-Server-Timing"
+
+# Latency buckets in seconds, from cache hits up to cold Prophet fits
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        return [(self.name, _label_text(self.labelnames, key), value) for key, value in sorted(values.items())]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._values = {}  # label values -> [per-bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            counts, total, count = self._values.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value, count + 1)
+
+    def samples(self):
+        with self._lock:
+            values = {key: (list(counts), total, count) for key, (counts, total, count) in self._values.items()}
+        samples = []
+        for key, (counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _label_text(self.labelnames, key, [("le", _number(bound))])
+                samples.append((f"{self.name}_bucket", labels, cumulative))
+            labels = _label_text(self.labelnames, key)
+            samples.append((f"{self.name}_sum", labels, total))
+            samples.append((f"{self.name}_count", labels, count))
+        return samples
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self):
+        # Prometheus text exposition format, version 0.0.4
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+STAGE_SECONDS = metrics.histogram(
+    "kitchensense_stage_seconds", "Time spent in named processing stages", ["stage"]
+)
+REQUEST_SECONDS = metrics.histogram(
+    "kitchensense_http_request_duration_seconds", "HTTP request latency", ["method", "endpoint", "status"]
+)
+CACHE_REQUESTS = metrics.counter(
+    "kitchensense_cache_requests_total", "Cache lookups by cache and result (hit/miss)", ["cache", "result"]
+)
+MODEL_FITS = metrics.counter(
+    "kitchensense_model_fits_total", "Models fitted or trained, by model kind and result", ["model", "result"]
+)
+LLM_CALLS = metrics.counter(
+    "kitchensense_llm_calls_total", "Upstream LLM calls (cache misses), by backend and result", ["backend", "result"]
+)
+DETECTOR_INFERENCES = metrics.counter(
+    "kitchensense_detector_inferences_total", "Images run through the detector, by backend", ["backend"]
+)
+
+
+def cache_lookup(cache, hit):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+class RequestTrace:
+    """Stage timings of one request, including job work it waits for."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}  # stage -> [seconds, calls]
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self._lock:
+            total = self.stages.setdefault(stage, [0.0, 0])
+            total[0] += seconds
+            total[1] += 1
+
+    def server_timing(self):
+        # "stage;dur=<ms>" per stage in first-seen order, then the request total
+        with self._lock:
+            stages = [(stage, seconds) for stage, (seconds, _) in self.stages.items()]
+        parts = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in stages]
+        parts.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(parts)
+
+
+# Context variables follow copy_context() into job threads, so workflow stages land on the request's trace
+_trace = contextvars.ContextVar("request_trace", default=None)
+
+
+def start_trace():
+    trace = RequestTrace()
+    _trace.set(trace)
+    return trace
+
+
+def current_trace():
+    return _trace.get()
+
+
+@contextmanager
+def stage(name):
+    # Times the block into the stage histogram and the current request's trace; usable as a decorator
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        trace = _trace.get()
+        if trace is not None:
+            trace.add(name, elapsed)
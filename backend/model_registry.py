@@ -0,0 +1,387 @@
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+
+import pandas as pd
+
+from forecast_executor import executor
+from dataset_service import dataset_fingerprint, load_dataset
+from prophet_params import ProphetParams, UnsupportedModel, verify_params, PARAMS_TOLERANCE
+from metrics import stage, cache_lookup, MODEL_FITS
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Fitted models are serialized here, one directory per dataset and fingerprint
+MODEL_CACHE_DIR = os.environ.get("MODEL_CACHE_DIR", os.path.join(BASE_DIR, "model_cache"))
+
+# "params": keep only extracted parameters in memory and predict with NumPy;
+# "prophet": keep the full Prophet objects
+FORECAST_PREDICTOR = os.environ.get("FORECAST_PREDICTOR", "params").lower()
+
+# Sales datasets the forecasting code fits per-item models on
+DATASETS = {
+    "realistic": os.path.join(BASE_DIR, "workflow2", "realistic_dataset.csv"),
+    "final": os.path.join(BASE_DIR, "workflow2", "final_dataset.csv"),
+    "monthly": os.path.join(BASE_DIR, "data", "menu_dataset_final.csv"),
+}
+
+# Directory with replacement CSVs under the same file names (e.g. benchmarks/synthetic_data.py output)
+DATASET_DIR = os.environ.get("DATASET_DIR")
+if DATASET_DIR:
+    DATASETS = {name: os.path.join(DATASET_DIR, os.path.basename(path)) for name, path in DATASETS.items()}
+
+
+def dataset_name(csv_path):
+    csv_path = os.path.abspath(csv_path)
+    for name, path in DATASETS.items():
+        if os.path.abspath(path) == csv_path:
+            return name
+    return os.path.splitext(os.path.basename(csv_path))[0]
+
+
+def load_histories(csv_path):
+    # Build one Prophet-ready (ds, y) frame per item
+    df = load_dataset(csv_path)
+    if "date" in df.columns:
+        df["ds"] = df["date"]
+    else:
+        # Monthly datasets only carry the month name and year
+        df["ds"] = pd.to_datetime(df["year"].astype(str) + "-" + df["month"].astype(str), format="%Y-%B")
+
+    histories = {}
+    for item, df_item in df.groupby("item_name", sort=False, observed=True):
+        df_item = df_item.sort_values("ds")[["ds", "sale_units"]].rename(columns={"sale_units": "y"})
+        histories[str(item)] = df_item.reset_index(drop=True)
+    return histories
+
+
+def fit_prophet(history, init=None):
+    from prophet import Prophet
+
+    model = Prophet()
+    if init is None:
+        model.fit(history)
+    else:
+        model.fit(history, init=init)
+    return model
+
+
+def warm_start_params(model):
+    # Fitted Stan parameters of a previous model, used as the optimizer's starting point
+    if isinstance(model, ProphetParams):
+        return model.init_params()
+    params = {name: model.params[name][0][0] for name in ("k", "m", "sigma_obs")}
+    params.update({name: model.params[name][0] for name in ("delta", "beta")})
+    return params
+
+
+def model_from_json(model_json):
+    # Prophet is only imported when a full model has to be deserialized
+    from prophet.serialize import model_from_json as prophet_from_json
+
+    return prophet_from_json(model_json)
+
+
+def _slug(value):
+    return re.sub(r"[^a-z0-9]+", "_", value.lower()).strip("_")
+
+
+class ModelRegistry:
+    def __init__(self, cache_dir=MODEL_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._models = {}  # (dataset, fingerprint, item) -> ProphetParams or fitted Prophet
+        # Guards the two dicts only; fits and dataset updates hold the per-dataset lock instead
+        self._lock = threading.RLock()
+        self._dataset_locks = {}  # dataset -> RLock
+
+    def dataset_lock(self, dataset):
+        # Held while a dataset's models are fitted or its file changes; requests for other datasets carry on
+        with self._lock:
+            return self._dataset_locks.setdefault(dataset, threading.RLock())
+
+    def _cached(self, key):
+        with self._lock:
+            return self._models.get(key)
+
+    def _cache(self, key, model):
+        with self._lock:
+            self._models[key] = model
+
+    def _dataset_dir(self, dataset, fingerprint):
+        return os.path.join(self.cache_dir, dataset, fingerprint)
+
+    def _model_path(self, dataset, fingerprint, item):
+        return os.path.join(self._dataset_dir(dataset, fingerprint), f"{_slug(item)}.json")
+
+    def _params_path(self, dataset, fingerprint, item):
+        return os.path.join(self._dataset_dir(dataset, fingerprint), f"{_slug(item)}.params.json")
+
+    def _read_manifest(self, dataset, fingerprint):
+        path = os.path.join(self._dataset_dir(dataset, fingerprint), "manifest.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def _write_manifest(self, dataset, fingerprint, items):
+        path = os.path.join(self._dataset_dir(dataset, fingerprint), "manifest.json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"items": list(items)}, f, indent=2)
+
+    def _load_from_disk(self, dataset, fingerprint, item):
+        if FORECAST_PREDICTOR == "params":
+            params_path = self._params_path(dataset, fingerprint, item)
+            if os.path.exists(params_path):
+                try:
+                    return ProphetParams.load(params_path)
+                except Exception as e:
+                    logger.warning(f"Discarding unreadable params {params_path}: {str(e)}")
+                    os.remove(params_path)
+
+        path = self._model_path(dataset, fingerprint, item)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r") as f:
+                model = model_from_json(f.read())
+        except Exception as e:
+            logger.warning(f"Discarding unreadable model {path}: {str(e)}")
+            os.remove(path)
+            return None
+        return self._predictor(dataset, fingerprint, item, model)
+
+    def _predictor(self, dataset, fingerprint, item, model):
+        """The in-memory form of a fitted model: its verified params, or the model itself."""
+        if FORECAST_PREDICTOR != "params":
+            return model
+        try:
+            predictor = ProphetParams.from_model(model)
+            error = verify_params(model, predictor)
+        except UnsupportedModel as e:
+            logger.info(f"Keeping the full Prophet model for {item}: {str(e)}")
+            return model
+        except Exception:
+            logger.exception(f"Could not extract params for {item}; keeping the full model")
+            return model
+        if error > PARAMS_TOLERANCE:
+            logger.warning(f"Params for {item} differ from model.predict by {error:.2e}; keeping the full model")
+            return model
+
+        self._save_text(self._params_path(dataset, fingerprint, item), predictor.to_json())
+        return predictor
+
+    def _save_text(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def _save_to_disk(self, dataset, fingerprint, item, model_json):
+        self._save_text(self._model_path(dataset, fingerprint, item), model_json)
+
+    def get_models(self, csv_path, items=None, on_fit=None):
+        """Return ({item: fitted model}, {item: error}), fitting only what is missing."""
+        dataset = dataset_name(csv_path)
+        fingerprint = dataset_fingerprint(csv_path)
+
+        # Concurrent cold requests for one dataset wait for a single fit
+        with self.dataset_lock(dataset):
+            histories = None
+            if items is None:
+                manifest = self._read_manifest(dataset, fingerprint)
+                if manifest is None:
+                    histories = load_histories(csv_path)
+                    items = list(histories)
+                else:
+                    items = manifest["items"]
+
+            models = {}
+            errors = {}
+            missing = []
+            for item in items:
+                key = (dataset, fingerprint, item)
+                model = self._cached(key)
+                if model is None:
+                    with stage("model_load"):
+                        model = self._load_from_disk(dataset, fingerprint, item)
+                    if model is not None:
+                        self._cache(key, model)
+                cache_lookup("forecast_model", model is not None)
+                if model is None:
+                    missing.append(item)
+                else:
+                    models[item] = model
+
+            if missing:
+                if histories is None:
+                    histories = load_histories(csv_path)
+                for item in missing:
+                    if item not in histories:
+                        errors[item] = "Unknown item"
+                missing = [item for item in missing if item in histories]
+
+                # Fits fan out across the forecast worker pool
+                logger.info(f"Fitting {len(missing)} Prophet models ({dataset}@{fingerprint})")
+                with stage("model_fit"):
+                    fitted, fit_errors = executor.fit_items(
+                        {item: histories[item] for item in missing}, on_item=on_fit
+                    )
+                MODEL_FITS.inc(len(fitted), model="prophet", result="ok")
+                MODEL_FITS.inc(len(fit_errors), model="prophet", result="error")
+                errors.update(fit_errors)
+                for item, model_json in fitted.items():
+                    self._save_to_disk(dataset, fingerprint, item, model_json)
+                    model = self._predictor(dataset, fingerprint, item, model_from_json(model_json))
+                    self._cache((dataset, fingerprint, item), model)
+                    models[item] = model
+                self._write_manifest(dataset, fingerprint, histories)
+
+        return models, errors
+
+    def refit_items(self, csv_path, previous_fingerprint, items, on_fit=None):
+        """Move a dataset's models to its new fingerprint, refitting only the given items."""
+        dataset = dataset_name(csv_path)
+        fingerprint = dataset_fingerprint(csv_path)
+        carried, refit, errors = [], [], {}
+
+        with self.dataset_lock(dataset):
+            previous = self._read_manifest(dataset, previous_fingerprint)
+            if previous is None or previous_fingerprint == fingerprint:
+                # Nothing fitted for the old version; models are fitted lazily on first use
+                return {"dataset": dataset, "fingerprint": fingerprint,
+                        "carried_forward": carried, "refit": refit, "failed_items": errors}
+
+            histories = load_histories(csv_path)
+            inits = {}
+            for item in histories:
+                old_path = self._model_path(dataset, previous_fingerprint, item)
+                old_model = self._cached((dataset, previous_fingerprint, item))
+                if old_model is None:
+                    old_model = self._load_from_disk(dataset, previous_fingerprint, item)
+
+                if item not in items and old_model is not None:
+                    # Unchanged history, so the previous fit is still exact
+                    new_path = self._model_path(dataset, fingerprint, item)
+                    os.makedirs(os.path.dirname(new_path), exist_ok=True)
+                    shutil.copyfile(old_path, new_path)
+                    old_params_path = self._params_path(dataset, previous_fingerprint, item)
+                    if os.path.exists(old_params_path):
+                        shutil.copyfile(old_params_path, self._params_path(dataset, fingerprint, item))
+                    self._cache((dataset, fingerprint, item), old_model)
+                    carried.append(item)
+                    continue
+
+                if old_model is not None:
+                    inits[item] = warm_start_params(old_model)
+                refit.append(item)
+
+            logger.info(f"Refitting {len(refit)} Prophet models ({dataset}@{fingerprint}), "
+                        f"{len(inits)} warm-started, {len(carried)} carried forward")
+            with stage("model_fit"):
+                fitted, errors = executor.fit_items(
+                    {item: histories[item] for item in refit}, on_item=on_fit, inits=inits
+                )
+            MODEL_FITS.inc(len(fitted), model="prophet", result="ok")
+            MODEL_FITS.inc(len(errors), model="prophet", result="error")
+            for item, model_json in fitted.items():
+                self._save_to_disk(dataset, fingerprint, item, model_json)
+                self._cache((dataset, fingerprint, item), self._predictor(
+                    dataset, fingerprint, item, model_from_json(model_json)
+                ))
+            self._write_manifest(dataset, fingerprint, histories)
+
+        return {"dataset": dataset, "fingerprint": fingerprint,
+                "carried_forward": carried, "refit": refit, "failed_items": errors}
+
+    def warm(self, csv_path):
+        models, errors = self.get_models(csv_path)
+        self.evict(dataset=dataset_name(csv_path), stale_only=True)
+        return {
+            "dataset": dataset_name(csv_path),
+            "fingerprint": dataset_fingerprint(csv_path),
+            "items": sorted(models),
+            "failed_items": errors,
+        }
+
+    def _current_fingerprints(self):
+        current = {}
+        for name, path in DATASETS.items():
+            if os.path.exists(path):
+                current[name] = dataset_fingerprint(path)
+        return current
+
+    def list_models(self):
+        current = self._current_fingerprints()
+        with self._lock:
+            loaded = set(self._models)
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+
+        for dataset in sorted(os.listdir(self.cache_dir)):
+            dataset_dir = os.path.join(self.cache_dir, dataset)
+            if not os.path.isdir(dataset_dir):
+                continue
+            for fingerprint in sorted(os.listdir(dataset_dir)):
+                manifest = self._read_manifest(dataset, fingerprint) or {"items": []}
+                for item in manifest["items"]:
+                    path = self._model_path(dataset, fingerprint, item)
+                    if not os.path.exists(path):
+                        continue
+                    params_path = self._params_path(dataset, fingerprint, item)
+                    entries.append({
+                        "dataset": dataset,
+                        "fingerprint": fingerprint,
+                        "item": item,
+                        "size_bytes": os.path.getsize(path),
+                        "params_size_bytes": os.path.getsize(params_path) if os.path.exists(params_path) else None,
+                        "loaded": (dataset, fingerprint, item) in loaded,
+                        "stale": current.get(dataset) not in (None, fingerprint),
+                    })
+        return entries
+
+    def evict(self, dataset=None, item=None, stale_only=False):
+        removed = 0
+
+        # A single dataset is evicted under its own lock; evicting everything takes the registry lock
+        with self.dataset_lock(dataset) if dataset is not None else self._lock:
+            for entry in self.list_models():
+                if dataset is not None and entry["dataset"] != dataset:
+                    continue
+                if item is not None and entry["item"] != item:
+                    continue
+                if stale_only and not entry["stale"]:
+                    continue
+
+                key = (entry["dataset"], entry["fingerprint"], entry["item"])
+                with self._lock:
+                    self._models.pop(key, None)
+                os.remove(self._model_path(*key))
+                if os.path.exists(self._params_path(*key)):
+                    os.remove(self._params_path(*key))
+                removed += 1
+
+            # Drop fingerprint directories that no longer hold any model
+            if os.path.isdir(self.cache_dir):
+                for name in os.listdir(self.cache_dir):
+                    if dataset is not None and name != dataset:
+                        continue
+                    dataset_dir = os.path.join(self.cache_dir, name)
+                    if not os.path.isdir(dataset_dir):
+                        continue
+                    for fingerprint in os.listdir(dataset_dir):
+                        fingerprint_dir = os.path.join(dataset_dir, fingerprint)
+                        if not any(f.endswith(".json") and f != "manifest.json" for f in os.listdir(fingerprint_dir)):
+                            shutil.rmtree(fingerprint_dir, ignore_errors=True)
+
+        return removed
+
+
+registry = ModelRegistry()
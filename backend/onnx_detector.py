@@ -0,0 +1,181 @@
+import logging
+import os
+import shutil
+import threading
+
+import numpy as np
+
+from dataset_service import dataset_fingerprint
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Exported ONNX models, keyed by the weights' content hash
+DETECTOR_ONNX_DIR = os.environ.get("DETECTOR_ONNX_DIR", os.path.join(BASE_DIR, "model_cache", "detector"))
+
+# Class names the detector was trained with
+DETECTOR_DATA_YAML = os.environ.get("DETECTOR_DATA_YAML", os.path.join(BASE_DIR, "workflow1", "data.yaml"))
+
+# Same defaults as ultralytics predict()
+CONF_THRESHOLD = 0.25
+IOU_THRESHOLD = 0.7
+MAX_DETECTIONS = 300
+MAX_WH = 7680  # class offset for per-class NMS in a single pass
+
+_export_lock = threading.Lock()
+
+
+def load_class_names(path=DETECTOR_DATA_YAML):
+    import yaml
+
+    with open(path) as f:
+        names = yaml.safe_load(f)["names"]
+    # data.yaml may list names or map index -> name
+    if isinstance(names, dict):
+        return {int(k): str(v) for k, v in names.items()}
+    return dict(enumerate(names))
+
+
+def export_onnx(weights_path, imgsz=640, int8=False):
+    # Exports once per weights version; later calls return the cached file
+    fingerprint = dataset_fingerprint(weights_path)
+    name = os.path.splitext(os.path.basename(weights_path))[0]
+    fp32_path = os.path.join(DETECTOR_ONNX_DIR, f"{name}-{fingerprint}-{imgsz}.onnx")
+    int8_path = os.path.join(DETECTOR_ONNX_DIR, f"{name}-{fingerprint}-{imgsz}-int8.onnx")
+    target = int8_path if int8 else fp32_path
+
+    with _export_lock:
+        if os.path.exists(target):
+            return target
+        os.makedirs(DETECTOR_ONNX_DIR, exist_ok=True)
+
+        if not os.path.exists(fp32_path):
+            from ultralytics import YOLO
+
+            logger.info(f"Exporting {weights_path} to ONNX at imgsz={imgsz}")
+            exported = YOLO(weights_path).export(format="onnx", imgsz=imgsz, dynamic=False, simplify=True)
+            tmp_path = fp32_path + ".tmp"
+            shutil.move(str(exported), tmp_path)
+            os.replace(tmp_path, fp32_path)
+
+        if int8:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            logger.info(f"Quantizing {fp32_path} to int8")
+            tmp_path = int8_path + ".tmp"
+            quantize_dynamic(fp32_path, tmp_path, weight_type=QuantType.QUInt8)
+            os.replace(tmp_path, int8_path)
+    return target
+
+
+def letterbox(image, size):
+    # Like ultralytics LetterBox(auto=False): centred, scale-up allowed, pad 114, always a full
+    # size x size square since the exported graph is static. The torch path pads .pt models only
+    # to the nearest multiple of the stride (auto=True), so inputs differ in padding and boxes can
+    # differ slightly; benchmarks/detector_backends.py checks the counts still agree.
+    import cv2
+
+    h, w = image.shape[:2]
+    gain = min(size / h, size / w)
+    new_w, new_h = int(round(w * gain)), int(round(h * gain))
+    dw, dh = (size - new_w) / 2, (size - new_h) / 2
+    if (w, h) != (new_w, new_h):
+        image = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
+    left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
+    return cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114))
+
+
+def preprocess(images, size):
+    # BGR uint8 HWC -> RGB float32 NCHW in [0, 1]
+    batch = np.stack([letterbox(image, size) for image in images])
+    batch = batch[..., ::-1].transpose(0, 3, 1, 2)
+    return np.ascontiguousarray(batch, dtype=np.float32) / 255.0
+
+
+def nms(boxes, scores, iou_threshold):
+    # Greedy NMS over xyxy boxes; returns kept indices, best score first
+    order = scores.argsort()[::-1]
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        x1 = np.maximum(boxes[i, 0], boxes[rest, 0])
+        y1 = np.maximum(boxes[i, 1], boxes[rest, 1])
+        x2 = np.minimum(boxes[i, 2], boxes[rest, 2])
+        y2 = np.minimum(boxes[i, 3], boxes[rest, 3])
+        inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.array(keep, dtype=int)
+
+
+def postprocess(output, image_shape, size, names, conf=CONF_THRESHOLD, iou=IOU_THRESHOLD):
+    # output: (4 + classes, anchors) of centre-xywh boxes and class scores
+    predictions = output.T
+    class_scores = predictions[:, 4:]
+    class_ids = class_scores.argmax(axis=1)
+    scores = class_scores[np.arange(len(class_ids)), class_ids]
+    mask = scores > conf
+    if not mask.any():
+        return []
+
+    xywh, scores, class_ids = predictions[mask, :4], scores[mask], class_ids[mask]
+    boxes = np.column_stack([
+        xywh[:, 0] - xywh[:, 2] / 2, xywh[:, 1] - xywh[:, 3] / 2,
+        xywh[:, 0] + xywh[:, 2] / 2, xywh[:, 1] + xywh[:, 3] / 2,
+    ])
+    keep = nms(boxes + class_ids[:, None] * MAX_WH, scores, iou)[:MAX_DETECTIONS]
+    boxes, scores, class_ids = boxes[keep], scores[keep], class_ids[keep]
+
+    # Undo the letterbox, as ultralytics scale_boxes does
+    h, w = image_shape[:2]
+    gain = min(size / h, size / w)
+    pad_x = round((size - w * gain) / 2 - 0.1)
+    pad_y = round((size - h * gain) / 2 - 0.1)
+    boxes[:, [0, 2]] = ((boxes[:, [0, 2]] - pad_x) / gain).clip(0, w)
+    boxes[:, [1, 3]] = ((boxes[:, [1, 3]] - pad_y) / gain).clip(0, h)
+
+    return [
+        {
+            "class_name": names.get(int(class_id), str(int(class_id))),
+            "confidence": float(score),
+            "box": [int(v) for v in box],
+        }
+        for box, score, class_id in zip(boxes, scores, class_ids)
+    ]
+
+
+class OnnxBackend:
+    def __init__(self, weights_path, imgsz=640, int8=False, threads=None):
+        import onnxruntime as ort
+
+        self.model_path = export_onnx(weights_path, imgsz=imgsz, int8=int8)
+        self.imgsz = imgsz
+        self.names = load_class_names()
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(self.model_path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        # Static exports take a fixed batch; others accept the whole chunk at once
+        batch = self.session.get_inputs()[0].shape[0]
+        self.fixed_batch = batch if isinstance(batch, int) else None
+
+    def __call__(self, images, imgsz=None, **kwargs):
+        # The exported graph has a fixed input size; other sizes would need another export
+        if imgsz is not None and int(imgsz) != self.imgsz:
+            raise ValueError(f"The ONNX detector was exported at imgsz={self.imgsz}, got imgsz={imgsz}")
+        step = self.fixed_batch or len(images)
+        detections = []
+        for start in range(0, len(images), step):
+            chunk = images[start:start + step]
+            outputs = self.session.run(None, {self.input_name: preprocess(chunk, self.imgsz)})[0]
+            for image, output in zip(chunk, outputs):
+                detections.append(postprocess(output, image.shape, self.imgsz, self.names))
+        return detections
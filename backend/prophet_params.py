@@ -0,0 +1,244 @@
+import json
+import os
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+# Years past the end of the history whose holiday dates are expanded into the params
+PARAMS_HOLIDAY_YEARS = int(os.environ.get("PARAMS_HOLIDAY_YEARS", 10))
+
+# Largest |yhat difference| against model.predict accepted, relative to the item's y scale
+PARAMS_TOLERANCE = float(os.environ.get("PARAMS_TOLERANCE", 1e-6))
+
+# Days past the history that verification also compares
+PARAMS_VERIFY_DAYS = 90
+
+PARAMS_VERSION = 1
+
+NS_PER_DAY = 86400 * 10 ** 9
+
+
+class UnsupportedModel(ValueError):
+    pass
+
+
+def _as_ns(index):
+    # Epoch nanoseconds; pandas may store datetimes in s/ms/us, where asi8 is in that unit
+    return index.as_unit("ns").asi8
+
+
+def _fourier(epoch_days, period, order):
+    # Same column order as Prophet.fourier_series: sin 1, cos 1, sin 2, cos 2, ...
+    angles = 2 * np.pi * np.outer(epoch_days / period, np.arange(1, order + 1))
+    features = np.empty((len(epoch_days), 2 * order))
+    features[:, 0::2] = np.sin(angles)
+    features[:, 1::2] = np.cos(angles)
+    return features
+
+
+def _holiday_dates(model, columns):
+    # Expand every holiday (explicit and country) with its windows into {feature column: [dates]}
+    if not columns:
+        return {}
+    history_ds = model.history["ds"]
+    years = pd.date_range(f"{history_ds.min().year}-01-01",
+                          f"{history_ds.max().year + PARAMS_HOLIDAY_YEARS}-12-31", freq="YS")
+    holidays = model.construct_holiday_dataframe(pd.Series(years))
+
+    dates = {column: set() for column in columns}
+    for row in holidays.dropna(subset=["ds"]).itertuples():
+        day = pd.Timestamp(row.ds).normalize()
+        try:
+            lower = int(getattr(row, "lower_window", 0))
+            upper = int(getattr(row, "upper_window", 0))
+        except ValueError:
+            # Country holidays carry NaN windows, which Prophet treats as the day alone
+            lower = upper = 0
+        for offset in range(lower, upper + 1):
+            column = f"{row.holiday}_delim_{'+' if offset >= 0 else '-'}{abs(offset)}"
+            if column in dates:
+                dates[column].add((day + pd.Timedelta(days=offset)).strftime("%Y-%m-%d"))
+    return {column: sorted(days) for column, days in dates.items()}
+
+
+def extract_params(model):
+    """Everything needed to evaluate a fitted Prophet model's mean forecast, as plain JSON values."""
+    if model.history is None:
+        raise UnsupportedModel("Model has not been fit")
+    if model.growth == "logistic":
+        raise UnsupportedModel("Logistic growth needs cap/floor columns at predict time")
+    if model.extra_regressors:
+        raise UnsupportedModel("Extra regressors need their values at predict time")
+    if any(props["condition_name"] is not None for props in model.seasonalities.values()):
+        raise UnsupportedModel("Conditional seasonalities need their condition at predict time")
+
+    # The fitted feature layout: seasonalities in order, then holiday columns, as in Prophet
+    features, _, component_cols, _ = model.make_all_seasonality_features(model.history)
+    seasonal_width = sum(2 * props["fourier_order"] for props in model.seasonalities.values())
+    holiday_columns = list(features.columns[seasonal_width:])
+    if holiday_columns == ["zeros"]:
+        holiday_columns = []
+
+    params = model.params
+    return {
+        "version": PARAMS_VERSION,
+        "growth": model.growth,
+        "start_ns": int(model.start.value),
+        "t_scale_ns": float(model.t_scale.value),
+        "y_scale": float(model.y_scale),
+        # prophet < 1.1.5 has no scaling option and always scales by absmax
+        "floor": float(getattr(model, "y_min", 0.0)) if getattr(model, "scaling", "absmax") == "minmax" else 0.0,
+        "changepoints_t": [float(t) for t in np.atleast_1d(model.changepoints_t)],
+        # MAP fits hold one row per parameter; MCMC fits are averaged like Prophet's point forecast
+        "k": float(np.nanmean(params["k"])),
+        "m": float(np.nanmean(params["m"])),
+        "delta": np.nanmean(params["delta"], axis=0).tolist(),
+        "beta": np.nanmean(params["beta"], axis=0).tolist(),
+        "sigma_obs": float(np.nanmean(params["sigma_obs"])),
+        "seasonalities": [
+            {"name": name, "period": float(props["period"]), "fourier_order": int(props["fourier_order"])}
+            for name, props in model.seasonalities.items()
+        ],
+        "holidays": _holiday_dates(model, holiday_columns),
+        "holiday_columns": holiday_columns,
+        "additive": component_cols["additive_terms"].astype(int).tolist(),
+        "multiplicative": component_cols["multiplicative_terms"].astype(int).tolist(),
+        "interval_width": float(model.interval_width),
+        "uncertainty_samples": int(model.uncertainty_samples or 0),
+    }
+
+
+class ProphetParams:
+    """NumPy evaluator of an extracted Prophet model; predict(df) returns Prophet's ds/trend/yhat columns.
+
+    yhat matches model.predict exactly up to float rounding. Intervals are analytic (normal
+    approximation of Prophet's simulated trend changes plus observation noise), so they are
+    close to, but not the same as, Prophet's sampled ones.
+    """
+
+    def __init__(self, params):
+        self.params = params
+        self.growth = params["growth"]
+        self.start_ns = params["start_ns"]
+        self.t_scale_ns = params["t_scale_ns"]
+        self.y_scale = params["y_scale"]
+        self.floor = params["floor"]
+        self.changepoints_t = np.asarray(params["changepoints_t"], dtype=float)
+        self.k = params["k"]
+        self.m = params["m"]
+        self.delta = np.asarray(params["delta"], dtype=float)
+        self.sigma_obs = params["sigma_obs"]
+        beta = np.asarray(params["beta"], dtype=float)
+        self.beta_additive = beta * np.asarray(params["additive"], dtype=float)
+        self.beta_multiplicative = beta * np.asarray(params["multiplicative"], dtype=float)
+        self.seasonalities = params["seasonalities"]
+        self.holiday_columns = params["holiday_columns"]
+        self.holidays = {
+            column: _as_ns(pd.DatetimeIndex(params["holidays"].get(column, []))) for column in self.holiday_columns
+        }
+        self.interval_width = params["interval_width"]
+        self.uncertainty_samples = params["uncertainty_samples"]
+
+    @classmethod
+    def from_model(cls, model):
+        return cls(extract_params(model))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r") as f:
+            return cls(json.load(f))
+
+    def to_json(self):
+        return json.dumps(self.params, separators=(",", ":"))
+
+    def init_params(self):
+        # Stan starting point for a warm-started refit, as warm_start_params builds from a model
+        return {
+            "k": self.k,
+            "m": self.m,
+            "sigma_obs": self.sigma_obs,
+            "delta": self.delta.copy(),
+            "beta": np.asarray(self.params["beta"], dtype=float),
+        }
+
+    def _trend_t(self, t):
+        if self.growth == "flat":
+            return np.full(len(t), self.m)
+        deltas_t = (self.changepoints_t[None, :] <= t[:, None]) * self.delta
+        k_t = self.k + deltas_t.sum(axis=1)
+        m_t = self.m + (deltas_t * -self.changepoints_t).sum(axis=1)
+        return k_t * t + m_t
+
+    def features(self, ds_ns):
+        epoch_days = ds_ns / NS_PER_DAY
+        blocks = [_fourier(epoch_days, s["period"], s["fourier_order"]) for s in self.seasonalities]
+        if self.holiday_columns:
+            days = ds_ns - ds_ns % NS_PER_DAY
+            blocks.append(np.column_stack([
+                np.isin(days, self.holidays[column]).astype(float) for column in self.holiday_columns
+            ]))
+        if not blocks:
+            # Prophet's dummy column when a model has no seasonal features
+            blocks.append(np.zeros((len(ds_ns), 1)))
+        return np.hstack(blocks)
+
+    def predict(self, df, intervals=None):
+        ds = pd.DatetimeIndex(pd.to_datetime(df["ds"]))
+        ds_ns = _as_ns(ds)
+        t = (ds_ns - self.start_ns) / self.t_scale_ns
+
+        trend = self._trend_t(t) * self.y_scale + self.floor
+        X = self.features(ds_ns)
+        additive = X @ self.beta_additive * self.y_scale
+        multiplicative = X @ self.beta_multiplicative
+        yhat = trend * (1 + multiplicative) + additive
+
+        result = pd.DataFrame({
+            "ds": ds,
+            "trend": trend,
+            "additive_terms": additive,
+            "multiplicative_terms": multiplicative,
+            "yhat": yhat,
+        })
+        if intervals is None:
+            intervals = self.uncertainty_samples > 0
+        if intervals:
+            band = NormalDist().inv_cdf((1 + self.interval_width) / 2) * np.sqrt(self._variance(t, multiplicative))
+            result["yhat_lower"] = yhat - band
+            result["yhat_upper"] = yhat + band
+        return result
+
+    def _variance(self, t, multiplicative):
+        # Observation noise, plus for t past the history (t > 1) new changepoints arriving at rate S
+        # with Laplace(0, lambda) rate changes: Var = S * 2 lambda^2 * (t - 1)^3 / 3
+        variance = np.full(len(t), (self.sigma_obs * self.y_scale) ** 2)
+        if self.growth != "flat":
+            rate = len(self.changepoints_t)
+            scale = np.mean(np.abs(self.delta)) + 1e-8
+            ahead = np.clip(t - 1, 0, None)
+            trend_variance = rate * 2 * scale ** 2 * ahead ** 3 / 3
+            variance += trend_variance * (self.y_scale * (1 + multiplicative)) ** 2
+        return variance
+
+    def size_bytes(self):
+        return len(self.to_json())
+
+
+def verify_params(model, predictor, dates=None):
+    """Largest |yhat| difference between the evaluator and model.predict, relative to y_scale."""
+    if dates is None:
+        history = pd.DatetimeIndex(model.history["ds"])
+        future = pd.date_range(history.max() + pd.Timedelta(days=1), periods=PARAMS_VERIFY_DAYS, freq="D")
+        dates = history.append(future)
+    future_df = pd.DataFrame({"ds": dates})
+
+    # The mean forecast does not depend on the uncertainty samples, so skip drawing them
+    samples = model.uncertainty_samples
+    model.uncertainty_samples = 0
+    try:
+        expected = model.predict(future_df)["yhat"].to_numpy()
+    finally:
+        model.uncertainty_samples = samples
+    actual = predictor.predict(future_df, intervals=False)["yhat"].to_numpy()
+    return float(np.max(np.abs(actual - expected)) / max(abs(predictor.y_scale), 1.0))
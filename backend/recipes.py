@@ -0,0 +1,84 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Optional JSON file ({dish: {ingredient: grams}}) replacing the built-in recipes
+RECIPES_PATH = os.environ.get("RECIPES_PATH")
+
+# Spellings used across the datasets mapped to one canonical ingredient name
+INGREDIENT_ALIASES = {
+    "patato": "potato",
+    "potatoes": "potato",
+    "oranges": "orange",
+    "tamto": "tomato",
+    "tomatoes": "tomato",
+    "apples": "apple",
+    "bananas": "banana",
+    "cucumbers": "cucumber",
+}
+
+# Define recipes with ingredient quantities (in grams per dish)
+RECIPES = {
+    "Tropical Fruit Salad": {"apple": 150, "banana": 100, "orange": 130},
+    "Garden Vegetable Medley": {"cucumber": 75, "okra": 60, "tomato": 50},
+    "Hearty Potato Curry": {"potato": 150, "tomato": 50, "okra": 60},
+    "Fruity Veggie Smoothie": {"apple": 100, "banana": 100, "cucumber": 75, "orange": 130},
+    "Spicy Veggie Stir-Fry": {"potato": 150, "tomato": 50, "okra": 60, "cucumber": 75},
+}
+
+
+def normalize_ingredient(name):
+    name = name.strip().lower()
+    return INGREDIENT_ALIASES.get(name, name)
+
+
+def load_recipes(path=RECIPES_PATH):
+    if not path:
+        return RECIPES
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+class RecipeMatrix:
+    # Dense items x ingredients matrix of grams per dish
+    def __init__(self, recipes):
+        self.items = list(recipes)
+        self.ingredients = sorted({
+            normalize_ingredient(ing) for recipe in recipes.values() for ing in recipe
+        })
+        self._item_index = {item: i for i, item in enumerate(self.items)}
+        ingredient_index = {ing: j for j, ing in enumerate(self.ingredients)}
+
+        self.matrix = np.zeros((len(self.items), len(self.ingredients)))
+        for i, item in enumerate(self.items):
+            for ing, grams in recipes[item].items():
+                self.matrix[i, ingredient_index[normalize_ingredient(ing)]] += grams
+
+    def rows(self, items):
+        # Recipe rows in the given item order; dishes without a recipe use nothing
+        rows = np.zeros((len(items), len(self.ingredients)))
+        for k, item in enumerate(items):
+            i = self._item_index.get(item)
+            if i is not None:
+                rows[k] = self.matrix[i]
+        return rows
+
+    def consumption(self, sales, items=None):
+        # sales is (n_items,) or (n_dates, n_items), ordered like `items`
+        rows = self.matrix if items is None else self.rows(list(items))
+        return np.asarray(sales, dtype=float) @ rows
+
+    def consumption_frame(self, sales):
+        # dates x items DataFrame -> dates x ingredients DataFrame
+        totals = self.consumption(sales.to_numpy(), items=sales.columns)
+        return pd.DataFrame(totals, index=sales.index, columns=self.ingredients)
+
+    def totals(self, sales_by_item):
+        # {item: units} -> {ingredient: grams}
+        totals = self.consumption(list(sales_by_item.values()), items=sales_by_item.keys())
+        return dict(zip(self.ingredients, totals.tolist()))
+
+
+recipe_matrix = RecipeMatrix(load_recipes())
@@ -0,0 +1,127 @@
+import logging
+import math
+import threading
+
+import pandas as pd
+
+from consumption_history import extend_daily_consumption
+from dataset_service import append_rows, load_dataset
+from forecast_scheduler import forecast_scheduler
+from model_registry import registry, dataset_name, DATASETS
+from recipes import recipe_matrix
+
+logger = logging.getLogger(__name__)
+
+# Daily sales/stock datasets that accept new rows
+DAILY_DATASETS = ["realistic", "final"]
+
+# Upper bound on rows per ingestion request
+MAX_INGEST_ROWS = 5000
+
+_ingest_lock = threading.Lock()
+
+
+class IngestError(ValueError):
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} invalid rows")
+        self.errors = errors
+
+
+def prepare_rows(csv_path, rows):
+    """Validate rows against the dataset schema; returns (new rows, duplicate count)."""
+    if not isinstance(rows, list) or not rows:
+        raise IngestError([{"row": None, "error": "rows must be a non-empty list"}])
+    if len(rows) > MAX_INGEST_ROWS:
+        raise IngestError([{"row": None, "error": f"At most {MAX_INGEST_ROWS} rows per request"}])
+
+    existing = load_dataset(csv_path, copy=False)
+    numeric_columns = [col for col in existing.columns if col not in ("item_name", "date")]
+    known_items = set(existing["item_name"].astype(str)) | set(recipe_matrix.items)
+
+    errors = []
+    records = []
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            errors.append({"row": index, "error": "row must be an object"})
+            continue
+        missing = [col for col in existing.columns if col not in row]
+        if missing:
+            errors.append({"row": index, "error": f"missing fields: {missing}"})
+            continue
+
+        record = {"item_name": str(row["item_name"]).strip()}
+        if record["item_name"] not in known_items:
+            errors.append({"row": index, "error": f"unknown item: {record['item_name']}"})
+            continue
+        try:
+            record["date"] = pd.to_datetime(row["date"], format="%Y-%m-%d").strftime("%Y-%m-%d")
+        except (TypeError, ValueError):
+            errors.append({"row": index, "error": "date must be YYYY-MM-DD"})
+            continue
+
+        bad = []
+        for col in numeric_columns:
+            value = row[col]
+            if (isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value)
+                    or value != int(value) or value < 0):
+                bad.append(col)
+            else:
+                record[col] = int(value)
+        if bad:
+            errors.append({"row": index, "error": f"non-negative integers required: {bad}"})
+            continue
+        records.append(record)
+
+    if errors:
+        raise IngestError(errors)
+
+    # Dedup on (item_name, date): the last row in the request wins, rows already stored are skipped
+    new_rows = pd.DataFrame.from_records(records, columns=list(existing.columns))
+    new_rows = new_rows.drop_duplicates(["item_name", "date"], keep="last")
+    same_dates = existing[existing["date"].isin(pd.to_datetime(new_rows["date"].unique()))]
+    stored = set(zip(same_dates["item_name"].astype(str), same_dates["date"].dt.strftime("%Y-%m-%d")))
+    is_new = [(item, date) not in stored for item, date in zip(new_rows["item_name"], new_rows["date"])]
+    duplicates = len(records) - int(sum(is_new))
+    return new_rows[is_new].sort_values(["date", "item_name"]).reset_index(drop=True), duplicates
+
+
+def ingest_sales(rows, datasets=None, progress=None):
+    # progress(stage, **info) is called between stages; it may raise to cancel
+    progress = progress or (lambda stage, **info: None)
+    results = {}
+
+    for name in datasets or DAILY_DATASETS:
+        csv_path = DATASETS[name]
+        # The dataset stays locked while the file changes so no request cold-fits the new version
+        with _ingest_lock, registry.dataset_lock(dataset_name(csv_path)):
+            new_rows, duplicates = prepare_rows(csv_path, rows)
+            if new_rows.empty:
+                results[name] = {"appended": 0, "duplicates": duplicates, "refit": [], "carried_forward": []}
+                continue
+
+            old_fingerprint, fingerprint = append_rows(csv_path, new_rows)
+            extend_daily_consumption(csv_path, old_fingerprint, fingerprint, new_rows)
+            progress("rows_appended", dataset=name, rows=len(new_rows), duplicates=duplicates)
+
+            # Only items that received rows are refit, warm-started from their previous fit
+            affected = sorted(new_rows["item_name"].unique())
+            refit = registry.refit_items(
+                csv_path, old_fingerprint, affected,
+                on_fit=lambda item, error: progress("item_fitted", dataset=name, item=item, error=error)
+            )
+            registry.evict(dataset=dataset_name(csv_path), stale_only=True)
+
+        logger.info(f"Ingested {len(new_rows)} rows into {name} ({old_fingerprint} -> {fingerprint})")
+        results[name] = {
+            "appended": len(new_rows),
+            "duplicates": duplicates,
+            "fingerprint": fingerprint,
+            "refit": refit["refit"],
+            "carried_forward": refit["carried_forward"],
+            "failed_items": refit["failed_items"],
+        }
+
+    # New sales invalidate the materialized forecast horizon, for sync and async callers alike
+    if any(result["appended"] for result in results.values()):
+        forecast_scheduler.notify()
+    return {"datasets": results}
@@ -0,0 +1,310 @@
+import logging
+import os
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from detector import detector
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on detector passes per second of video
+STREAM_SAMPLE_FPS = float(os.environ.get("STREAM_SAMPLE_FPS", 5))
+
+# A frame is always sampled after this long, even if the scene looks unchanged
+STREAM_MAX_GAP_SECONDS = float(os.environ.get("STREAM_MAX_GAP_SECONDS", 1.0))
+
+# Mean absolute grayscale change (0-255) below which a frame counts as unchanged
+STREAM_MOTION_THRESHOLD = float(os.environ.get("STREAM_MOTION_THRESHOLD", 2.0))
+
+# Inference size for sampled frames; 720p is downscaled to this
+STREAM_IMGSZ = int(os.environ.get("STREAM_IMGSZ", 640))
+
+# Tracker: minimum IoU to continue a track, sampled frames a track may go
+# unmatched, and matches needed before a track is counted
+STREAM_IOU_THRESHOLD = float(os.environ.get("STREAM_IOU_THRESHOLD", 0.3))
+STREAM_MAX_AGE = int(os.environ.get("STREAM_MAX_AGE", 3))
+STREAM_MIN_HITS = int(os.environ.get("STREAM_MIN_HITS", 2))
+
+# Idle frame-upload sessions are dropped after this long (seconds)
+STREAM_SESSION_TTL_SECONDS = int(os.environ.get("STREAM_SESSION_TTL_SECONDS", 600))
+
+# Thumbnail used for the motion check
+MOTION_THUMB_SIZE = (64, 36)
+
+
+def box_iou(a, b):
+    # Pairwise IoU of (N, 4) and (M, 4) xyxy boxes
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.where(union > 0, union, 1), 0.0)
+
+
+class Track:
+    def __init__(self, track_id, class_name, box):
+        self.id = track_id
+        self.class_name = class_name
+        self.box = np.asarray(box, dtype=float)
+        self.velocity = np.zeros(4)
+        self.hits = 1
+        self.misses = 0
+        self.counted = False
+
+    def predicted_box(self):
+        # Constant-velocity guess for where the object is on the next sample
+        return self.box + self.velocity * (self.misses + 1)
+
+
+class IoUTracker:
+    def __init__(self, iou_threshold=STREAM_IOU_THRESHOLD, max_age=STREAM_MAX_AGE, min_hits=STREAM_MIN_HITS):
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.tracks = []
+        self.item_counts = {}
+        self._next_id = 1
+
+    def update(self, detections):
+        # Returns the tracks counted for the first time on this frame
+        matched_tracks = set()
+        matched_detections = set()
+
+        for class_name in {d["class_name"] for d in detections}:
+            det_idx = [i for i, d in enumerate(detections) if d["class_name"] == class_name]
+            trk_idx = [i for i, t in enumerate(self.tracks) if t.class_name == class_name]
+            if not trk_idx:
+                continue
+
+            iou = box_iou(
+                np.array([self.tracks[i].predicted_box() for i in trk_idx]),
+                np.array([detections[i]["box"] for i in det_idx], dtype=float)
+            )
+            # Greedy assignment, best overlaps first
+            for flat in np.argsort(iou, axis=None)[::-1]:
+                t, d = np.unravel_index(flat, iou.shape)
+                if iou[t, d] < self.iou_threshold:
+                    break
+                if trk_idx[t] in matched_tracks or det_idx[d] in matched_detections:
+                    continue
+                track = self.tracks[trk_idx[t]]
+                box = np.asarray(detections[det_idx[d]]["box"], dtype=float)
+                step = (box - track.box) / (track.misses + 1)
+                track.velocity = 0.5 * track.velocity + 0.5 * step
+                track.box = box
+                track.hits += 1
+                track.misses = 0
+                matched_tracks.add(trk_idx[t])
+                matched_detections.add(det_idx[d])
+
+        survivors = []
+        for i, track in enumerate(self.tracks):
+            if i not in matched_tracks:
+                track.misses += 1
+            if track.misses <= self.max_age:
+                survivors.append(track)
+        self.tracks = survivors
+
+        for i, detection in enumerate(detections):
+            if i not in matched_detections:
+                self.tracks.append(Track(self._next_id, detection["class_name"], detection["box"]))
+                self._next_id += 1
+
+        counted = []
+        for track in self.tracks:
+            if not track.counted and track.hits >= self.min_hits:
+                track.counted = True
+                self.item_counts[track.class_name] = self.item_counts.get(track.class_name, 0) + 1
+                counted.append(track)
+        return counted
+
+
+class StreamCounter:
+    """Counts each item once across a sequence of frames."""
+
+    def __init__(self, sample_fps=STREAM_SAMPLE_FPS, imgsz=STREAM_IMGSZ, min_hits=STREAM_MIN_HITS,
+                 iou_threshold=STREAM_IOU_THRESHOLD, realtime=True):
+        self.tracker = IoUTracker(iou_threshold=iou_threshold, min_hits=min_hits)
+        self.min_interval = 1.0 / sample_fps if sample_fps > 0 else 0.0
+        self.imgsz = imgsz
+        # Realtime sources also space samples by inference latency so the
+        # detector never falls behind playback
+        self.realtime = realtime
+        self.latency = 0.0
+        self.frames_seen = 0
+        self.frames_processed = 0
+        self.frames_static = 0
+        self.processing_seconds = 0.0
+        self.media_seconds = 0.0
+        self._last_sample_time = None
+        self._last_check_time = None
+        self._last_thumb = None
+
+    def due(self, timestamp):
+        # Cheap check before a frame is even decoded
+        if self._last_sample_time is None:
+            return True
+        # Small tolerance so frame-index timestamps land exactly on the interval
+        if timestamp - self._last_check_time < self.min_interval - 1e-6:
+            return False
+        return not self.realtime or timestamp - self._last_sample_time >= self.latency - 1e-6
+
+    def _thumbnail(self, frame):
+        import cv2
+
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        return cv2.resize(gray, MOTION_THUMB_SIZE, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def process(self, frame, timestamp, index=None):
+        # Returns a partial-count event, or None if the frame was skipped
+        self.frames_seen += 1
+        self.media_seconds = max(self.media_seconds, timestamp)
+        self._last_check_time = timestamp
+
+        thumb = self._thumbnail(frame)
+        if self._last_thumb is not None:
+            motion = float(np.abs(thumb - self._last_thumb).mean())
+            gap = timestamp - self._last_sample_time
+            if motion < STREAM_MOTION_THRESHOLD and gap < STREAM_MAX_GAP_SECONDS:
+                self.frames_static += 1
+                return None
+
+        start = time.perf_counter()
+        detections = detector.predict(frame, imgsz=self.imgsz, verbose=False)[0]
+        counted = self.tracker.update(detections)
+        elapsed = time.perf_counter() - start
+
+        # The first pass may include loading the model, so it does not seed the latency
+        if self.frames_processed == 1:
+            self.latency = elapsed
+        elif self.frames_processed > 1:
+            self.latency = 0.8 * self.latency + 0.2 * elapsed
+        self.processing_seconds += elapsed
+        self.frames_processed += 1
+        self._last_sample_time = timestamp
+        self._last_thumb = thumb
+
+        new_items = {}
+        for track in counted:
+            new_items[track.class_name] = new_items.get(track.class_name, 0) + 1
+        return {
+            "event": "frame",
+            "frame": index,
+            "time": round(timestamp, 3),
+            "detections": len(detections),
+            "new_items": new_items,
+            "item_counts": dict(self.tracker.item_counts),
+        }
+
+    def summary(self):
+        return {
+            "event": "done",
+            "item_counts": dict(self.tracker.item_counts),
+            "frames_seen": self.frames_seen,
+            "frames_processed": self.frames_processed,
+            "frames_static": self.frames_static,
+            "media_seconds": round(self.media_seconds, 3),
+            "processing_seconds": round(self.processing_seconds, 3),
+        }
+
+
+def count_video(path, counter):
+    # Yields partial-count events while walking the video once
+    import cv2
+
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise ValueError("Could not open video")
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+    try:
+        index = 0
+        while True:
+            timestamp = index / fps
+            # grab() skips the colour conversion for frames that are not sampled
+            if not capture.grab():
+                break
+            if counter.due(timestamp):
+                ok, frame = capture.retrieve()
+                if ok:
+                    event = counter.process(frame, timestamp, index)
+                    if event is not None:
+                        yield event
+            else:
+                counter.frames_seen += 1
+                counter.media_seconds = timestamp
+            index += 1
+    finally:
+        capture.release()
+
+
+class StreamSession:
+    def __init__(self, fps, counter):
+        self.id = uuid.uuid4().hex
+        self.fps = fps
+        self.counter = counter
+        self.frames_received = 0
+        self.updated_at = time.time()
+        self.lock = threading.Lock()
+
+    def process_frames(self, frames):
+        # Frames continue the session timeline at the session's frame rate
+        with self.lock:
+            self.updated_at = time.time()
+            for frame in frames:
+                index = self.frames_received
+                self.frames_received += 1
+                if frame is None:
+                    continue
+                timestamp = index / self.fps
+                if not self.counter.due(timestamp):
+                    self.counter.frames_seen += 1
+                    continue
+                event = self.counter.process(frame, timestamp, index)
+                if event is not None:
+                    yield event
+            self.updated_at = time.time()
+
+    def to_dict(self):
+        data = self.counter.summary()
+        data.pop("event")
+        data.update({"session_id": self.id, "fps": self.fps, "frames_received": self.frames_received})
+        return data
+
+
+class StreamSessions:
+    def __init__(self, ttl_seconds=STREAM_SESSION_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def create(self, fps, counter):
+        self._prune()
+        session = StreamSession(fps, counter)
+        with self._lock:
+            self._sessions[session.id] = session
+        return session
+
+    def get(self, session_id):
+        self._prune()
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def close(self, session_id):
+        with self._lock:
+            return self._sessions.pop(session_id, None)
+
+    def _prune(self):
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            for session_id in [k for k, s in self._sessions.items() if s.updated_at < cutoff]:
+                del self._sessions[session_id]
+
+
+stream_sessions = StreamSessions()
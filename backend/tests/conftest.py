@@ -0,0 +1,37 @@
+import os
+import sys
+
+import flask_pymongo
+import mongomock
+import pytest
+
+# Make the backend modules importable from the tests directory
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+os.environ.setdefault("AUTH_SECRET_KEY", "test-secret-key-for-signing-session-tokens")
+os.environ.setdefault("ENABLED_SUBSYSTEMS", "auth")
+os.environ.setdefault("FORECAST_SCHEDULER", "false")
+os.environ.setdefault("DETECTOR_WARMUP", "false")
+
+
+class MongomockPyMongo:
+    # flask_pymongo.PyMongo(app) backed by an in-memory mongomock database
+    def __init__(self, app=None, *args, **kwargs):
+        self.cx = mongomock.MongoClient()
+        self.db = self.cx.kitchensense
+
+
+flask_pymongo.PyMongo = MongomockPyMongo
+
+
+@pytest.fixture
+def app():
+    from app import create_app
+    return create_app(["auth"])
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,100 @@
+import pytest
+
+import api_auth
+import auth
+
+USER = {"name": "Asha", "email": "asha@example.com", "restaurant_name": "Spice Route", "password": "s3cret"}
+
+
+def login(client, email=USER["email"], password=USER["password"]):
+    return client.post("/login", json={"email": email, "password": password})
+
+
+def auth_header(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_signup_hashes_password(client):
+    assert client.post("/signup", json=USER).status_code == 201
+    stored = api_auth.users.collection.find_one({"email": USER["email"]})
+    assert stored["password"] != USER["password"]
+    assert stored["password"].split(":")[0] in ("scrypt", "pbkdf2")
+
+
+def test_signup_rejects_duplicate_email(client):
+    assert client.post("/signup", json=USER).status_code == 201
+    response = client.post("/signup", json=USER)
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "Email already exists"
+    assert api_auth.users.collection.count_documents({"email": USER["email"]}) == 1
+
+
+def test_signup_requires_fields(client):
+    assert client.post("/signup", json={"email": USER["email"]}).status_code == 400
+
+
+def test_login_returns_user_and_token(client):
+    client.post("/signup", json=USER)
+    response = login(client)
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["user"]["email"] == USER["email"]
+    assert "password" not in data["user"]
+    assert data["token"]
+
+
+def test_login_rejects_wrong_password(client):
+    client.post("/signup", json=USER)
+    assert login(client, password="wrong").status_code == 401
+    assert login(client, email="nobody@example.com").status_code == 401
+
+
+def test_legacy_plaintext_password_is_rehashed(client):
+    api_auth.users.collection.insert_one({**USER, "email": "old@example.com"})
+    assert login(client, email="old@example.com").status_code == 200
+    stored = api_auth.users.collection.find_one({"email": "old@example.com"})
+    assert stored["password"] != USER["password"]
+    assert login(client, email="old@example.com").status_code == 200
+
+
+def test_login_required(client):
+    client.post("/signup", json=USER)
+    token = login(client).get_json()["token"]
+
+    assert client.get("/api/admin/llm_cache").status_code == 401
+    assert client.get("/api/admin/llm_cache", headers=auth_header("not-a-token")).status_code == 401
+    assert client.get("/api/admin/llm_cache", headers=auth_header(token)).status_code == 200
+
+
+def test_logout_revokes_token(client):
+    client.post("/signup", json=USER)
+    token = login(client).get_json()["token"]
+
+    assert client.post("/logout", headers=auth_header(token)).status_code == 200
+    response = client.get("/api/admin/llm_cache", headers=auth_header(token))
+    assert response.status_code == 401
+    assert response.get_json()["error"] == "Token revoked"
+    # A fresh login still works
+    assert client.get("/api/admin/llm_cache", headers=auth_header(login(client).get_json()["token"])).status_code == 200
+
+
+def test_signup_rejects_non_string_fields(client):
+    response = client.post("/signup", json={**USER, "password": 123})
+    assert response.status_code == 400
+    assert client.post("/signup", json={**USER, "email": ["asha@example.com"]}).status_code == 400
+    assert api_auth.users.collection.count_documents({}) == 0
+
+
+def test_logout_reaches_other_workers(client):
+    client.post("/signup", json=USER)
+    token = login(client).get_json()["token"]
+
+    # A second worker: same signing key and revocation store, its own token cache
+    other_worker = auth.TokenCache(
+        secret=auth.token_cache.secret, revocations=auth.token_cache.revocations, sync_seconds=0
+    )
+    assert other_worker.verify(token)["email"] == USER["email"]
+
+    assert client.post("/logout", headers=auth_header(token)).status_code == 200
+    with pytest.raises(auth.AuthError, match="Token revoked"):
+        other_worker.verify(token)
@@ -0,0 +1,21 @@
+import numpy as np
+import pandas as pd
+
+import boosted_model
+import dataset_service
+from benchmarks.synthetic_data import write_datasets
+
+
+def test_trains_past_sklearn_category_cap(tmp_path, monkeypatch):
+    monkeypatch.setattr(dataset_service, "DATASET_CACHE_DIR", str(tmp_path / "cache"))
+    items = boosted_model.MAX_CATEGORICAL_ITEMS + 45
+    summary = write_datasets(str(tmp_path), items=items, years=1, monthly_years=1)
+
+    model = boosted_model.train_boosted_model(summary["files"]["realistic_dataset.csv"]["path"])
+    assert len(model.items) == items
+    assert np.isfinite(model.metrics["mae"])
+
+    dates = pd.date_range(model.last_date - pd.Timedelta(days=2), periods=5, freq="D")
+    predictions = model.predict_item_sales(dates)
+    assert predictions.shape == (5, items)
+    assert predictions.notna().all().all()
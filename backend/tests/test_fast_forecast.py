@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from fast_forecast import fit_fast_model
+
+
+def history(dates, rng):
+    return pd.DataFrame({"ds": dates, "y": rng.poisson(50, len(dates)).astype(float)})
+
+
+def test_short_histories_do_not_break_the_fit():
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("2022-01-01", "2024-12-31", freq="D")
+    histories = {
+        "Paneer Tikka": history(dates, rng),
+        "New Dish": history(dates[-5:], rng),  # fewer rows than features
+        "Launched Today": history(dates[-1:], rng),
+    }
+
+    model = fit_fast_model(histories)
+    assert model.items == ["Paneer Tikka", "New Dish"]
+    assert set(model.failed_items) == {"Launched Today"}
+
+    sales = model.predict_item_sales(pd.date_range("2025-01-01", periods=7, freq="D"))
+    assert list(sales.columns) == model.items
+    assert np.isfinite(sales.to_numpy()).all()
+
+
+def test_seasonality_follows_data_spacing():
+    rng = np.random.default_rng(0)
+    # Microsecond resolution, the default for parsed dates on pandas 3
+    monthly = pd.date_range("2019-01-01", "2024-12-01", freq="MS").as_unit("us")
+    daily = pd.date_range("2022-01-01", "2024-12-31", freq="D").as_unit("us")
+
+    model = fit_fast_model({"Paneer Tikka": history(monthly, rng)})
+    assert not model.weekly
+    assert model.yearly_order == 5
+
+    model = fit_fast_model({"Paneer Tikka": history(daily, rng)})
+    assert model.weekly
+    assert model.yearly_order == 10
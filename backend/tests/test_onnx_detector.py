@@ -0,0 +1,75 @@
+import sys
+import types
+
+import numpy as np
+import pytest
+
+import detector
+import onnx_detector
+
+IMGSZ = 64
+NAMES = {0: "tomato", 1: "potato"}
+
+
+class FakeSession:
+    # Static export: batch of 1, one confident potato box centred in the input
+    def __init__(self, path, options=None, providers=None):
+        self.inputs = []
+
+    def get_inputs(self):
+        return [types.SimpleNamespace(name="images", shape=[1, 3, IMGSZ, IMGSZ])]
+
+    def run(self, outputs, feeds):
+        batch = feeds["images"]
+        self.inputs.append(batch.shape)
+        output = np.zeros((len(batch), 4 + len(NAMES), 3), dtype=np.float32)
+        output[:, :4, 0] = [32, 32, 20, 10]
+        output[:, 5, 0] = 0.9
+        return [output]
+
+
+@pytest.fixture
+def fake_onnxruntime(monkeypatch):
+    ort = types.SimpleNamespace(
+        SessionOptions=types.SimpleNamespace,
+        GraphOptimizationLevel=types.SimpleNamespace(ORT_ENABLE_ALL=99),
+        InferenceSession=FakeSession,
+    )
+    monkeypatch.setitem(sys.modules, "onnxruntime", ort)
+    monkeypatch.setattr(onnx_detector, "export_onnx", lambda path, imgsz, int8: f"{path}-{imgsz}.onnx")
+    monkeypatch.setattr(onnx_detector, "load_class_names", lambda: NAMES)
+    # Inputs are already square at the export size, so letterboxing is a no-op
+    monkeypatch.setattr(onnx_detector, "letterbox", lambda image, size: image)
+    monkeypatch.setattr(detector, "DETECTOR_IMGSZ", IMGSZ)
+
+
+def test_onnx_backend_selected(fake_onnxruntime):
+    backend = detector.load_backend("onnx", "best.pt")
+    assert isinstance(backend, onnx_detector.OnnxBackend)
+    assert backend.imgsz == IMGSZ
+    assert backend.fixed_batch == 1
+    assert detector.Detector(model_path="best.pt", backend="onnx").fixed_imgsz == IMGSZ
+    assert detector.Detector(model_path="best.pt", backend="torch").fixed_imgsz is None
+
+    with pytest.raises(ValueError):
+        detector.load_backend("tensorrt", "best.pt")
+
+
+def test_onnx_backend_output_contract(fake_onnxruntime):
+    backend = detector.load_backend("onnx", "best.pt")
+    images = [np.zeros((IMGSZ, IMGSZ, 3), dtype=np.uint8) for _ in range(3)]
+
+    results = backend(images, imgsz=IMGSZ, verbose=False)
+    # One list of detections per image, run in chunks of the static batch size
+    assert backend.session.inputs == [(1, 3, IMGSZ, IMGSZ)] * 3
+    assert len(results) == 3
+    for detections in results:
+        assert detections == [{"class_name": "potato", "confidence": pytest.approx(0.9), "box": [22, 27, 42, 37]}]
+
+
+def test_onnx_backend_rejects_other_imgsz(fake_onnxruntime):
+    backend = detector.load_backend("onnx", "best.pt")
+    image = np.zeros((IMGSZ, IMGSZ, 3), dtype=np.uint8)
+    assert len(backend([image])) == 1
+    with pytest.raises(ValueError, match="imgsz"):
+        backend([image], imgsz=IMGSZ * 2)
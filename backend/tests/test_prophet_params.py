@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from prophet_params import ProphetParams, extract_params, verify_params
+
+pytest.importorskip("prophet")
+
+
+@pytest.fixture(scope="module")
+def model():
+    from model_registry import fit_prophet
+
+    rng = np.random.default_rng(0)
+    # Microsecond resolution, the default for parsed dates on pandas 3
+    ds = pd.DatetimeIndex(pd.date_range("2021-01-01", "2023-12-31", freq="D")).as_unit("us")
+    weekly = np.where(ds.dayofweek >= 5, 10.0, 0.0)
+    y = 50 + 0.01 * np.arange(len(ds)) + weekly + rng.normal(0, 2, len(ds))
+    return fit_prophet(pd.DataFrame({"ds": ds, "y": y}))
+
+
+def test_params_match_predict_on_microsecond_dates(model):
+    predictor = ProphetParams.from_model(model)
+    assert verify_params(model, predictor) < 1e-9
+
+    dates = pd.date_range("2024-01-01", periods=30, freq="D").as_unit("us")
+    expected = model.predict(pd.DataFrame({"ds": dates}))["yhat"].to_numpy()
+    actual = predictor.predict(pd.DataFrame({"ds": dates}), intervals=False)["yhat"].to_numpy()
+    np.testing.assert_allclose(actual, expected, rtol=1e-9)
+
+
+def test_models_without_scaling_option(model, monkeypatch):
+    # prophet 1.1.4 sets neither scaling nor y_min
+    monkeypatch.delattr(model, "scaling", raising=False)
+    monkeypatch.delattr(model, "y_min", raising=False)
+    assert extract_params(model)["floor"] == 0.0
@@ -0,0 +1,116 @@
+import logging
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from dataset_service import dataset_fingerprint, load_dataset
+from metrics import stage, cache_lookup, MODEL_FITS
+
+logger = logging.getLogger(__name__)
+
+# Features for prediction
+FEATURES = ['sale_units', 'price', 'year']
+
+_models = {}  # csv path -> WasteModel
+_lock = threading.Lock()
+
+
+def waste_ingredients(df):
+    # Ingredients with a stock_<name> column in the daily sales datasets
+    return sorted(col[len("stock_"):] for col in df.columns if col.startswith("stock_") and col != "stock_level")
+
+
+class WasteModel:
+    def __init__(self, fingerprint, coefficients, metrics, high_risk_dishes, high_risk_ingredients):
+        self.fingerprint = fingerprint
+        self.coefficients = coefficients  # (intercept + features) x targets
+        self.metrics = metrics
+        self.high_risk_dishes = high_risk_dishes
+        self.high_risk_ingredients = high_risk_ingredients
+        self.trained_at = time.time()
+
+    def predict(self, X):
+        design = np.column_stack([np.ones(len(X)), X[FEATURES].to_numpy(dtype=float)])
+        return pd.DataFrame(design @ self.coefficients.to_numpy(), index=X.index, columns=self.coefficients.columns)
+
+    def to_dict(self):
+        return {
+            "fingerprint": self.fingerprint,
+            "trained_at": self.trained_at,
+            # Lists keep the ranking order through JSON encoding
+            "high_risk_dishes": [
+                {"item_name": k, "predicted_waste": float(v)} for k, v in self.high_risk_dishes.items()
+            ],
+            "high_risk_ingredients": [
+                {"ingredient": k, "predicted_waste": float(v)} for k, v in self.high_risk_ingredients.items()
+            ],
+            "metrics": self.metrics,
+        }
+
+
+def train_waste_model(csv_path):
+    df = load_dataset(csv_path)
+    df['year'] = df['date'].dt.year
+
+    # Calculate waste units (stock level - sale units, ensuring no negative values)
+    targets = {'waste_units': (df['stock_level'] - df['sale_units']).clip(lower=0)}
+    ingredients = waste_ingredients(df)
+    for ing in ingredients:
+        # Using total sale units (no individual sale per ingredient)
+        targets[f"waste_{ing}"] = (df[f"stock_{ing}"] - df['sale_units']).clip(lower=0)
+    Y = pd.DataFrame(targets).to_numpy(dtype=float)
+
+    design = np.column_stack([np.ones(len(df)), df[FEATURES].to_numpy(dtype=float)])
+
+    # Same 80/20 split the per-target LinearRegression fits used; sklearn is slow to import, so only training loads it
+    from sklearn.model_selection import train_test_split
+    train_idx, test_idx = train_test_split(np.arange(len(df)), test_size=0.2, random_state=42)
+
+    # One least-squares solve for every target at once
+    coef, _, _, _ = np.linalg.lstsq(design[train_idx], Y[train_idx], rcond=None)
+    coefficients = pd.DataFrame(coef, index=['intercept'] + FEATURES, columns=list(targets))
+
+    # Evaluate on the held-out rows
+    y_pred = design[test_idx] @ coef
+    y_test = Y[test_idx]
+    mse = ((y_test - y_pred) ** 2).mean(axis=0)
+    variance = ((y_test - y_test.mean(axis=0)) ** 2).mean(axis=0)
+    r2 = 1 - mse / np.where(variance == 0, np.nan, variance)
+    metrics = {
+        target: {"mse": float(mse[k]), "r2": None if np.isnan(r2[k]) else float(r2[k])}
+        for k, target in enumerate(targets)
+    }
+
+    # Identify high-risk dishes (sorted by highest predicted waste)
+    predicted = pd.DataFrame(y_pred, columns=list(targets))
+    predicted['item_name'] = df['item_name'].to_numpy()[test_idx]
+    high_risk_dishes = (
+        predicted.groupby('item_name', observed=True)['waste_units'].mean().sort_values(ascending=False)
+    )
+    high_risk_dishes.index = high_risk_dishes.index.astype(str)
+
+    # Average predicted waste per ingredient as its risk factor
+    high_risk_ingredients = pd.Series({
+        ing: predicted[f"waste_{ing}"].mean() for ing in ingredients
+    }).sort_values(ascending=False)
+
+    return WasteModel(dataset_fingerprint(csv_path), coefficients, metrics, high_risk_dishes, high_risk_ingredients)
+
+
+def get_waste_model(csv_path):
+    # Retrained only when the dataset fingerprint changes
+    fingerprint = dataset_fingerprint(csv_path)
+    with _lock:
+        model = _models.get(csv_path)
+        cache_lookup("waste_model", model is not None and model.fingerprint == fingerprint)
+        if model is not None and model.fingerprint == fingerprint:
+            return model
+
+        logger.info(f"Training waste models for {csv_path}")
+        with stage("waste_model_train"):
+            model = train_waste_model(csv_path)
+        MODEL_FITS.inc(model="waste", result="ok")
+        _models[csv_path] = model
+        return model
@@ -1,28 +1,23 @@
 import os
-import google.generativeai as genai
-import pandas as pd
+import sys
 import json
-import time
 
-# Configure Gemini API key
-genai.configure(api_key="gemini_api")
+# Make the backend modules importable when run as a script
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from dataset_service import load_dataset
+from llm_cache import llm_cache
+from metrics import stage
+from model_registry import DATASETS, DATASET_DIR
 
 # Get the script's directory
 script_dir = os.path.dirname(os.path.abspath(__file__))
-dataset_path = os.path.join(script_dir, "menu_dataset_final.csv")
+# Generated datasets replace the bundled menu data as well
+dataset_path = DATASETS["monthly"] if DATASET_DIR else os.path.join(script_dir, "menu_dataset_final.csv")
 output_path = os.path.join(script_dir, "generated_menu.json")
 
-# Load menu dataset
-try:
-    if not os.path.exists(dataset_path):
-        raise FileNotFoundError(f"Dataset not found at {dataset_path}")
-
-    df = pd.read_csv(dataset_path)
-    menu_items = df.to_dict(orient='records')
-except Exception as e:
-    print(json.dumps({"error": f"Error loading dataset: {str(e)}"}))
-    exit(1)
-
 # Define input data
 input_data = {
     "high_risk_ingredients": {
@@ -83,24 +78,30 @@ Ensure the JSON output is **correctly formatted**.
 
 """
 
-# Generate menu using Gemini
-try:
-    print(json.dumps({"status": "Generating menu..."}))  # Initial status
-    model = genai.GenerativeModel('gemini-2.0-flash')
-    response = model.generate_content(prompt)
-    
-    # Extract the JSON part from the response
-    response_text = response.text
-    # Find the JSON part between ```json and ``` markers
-    if "```json" in response_text:
-        response_text = response_text.split("```json")[1].split("```")[0].strip()
-    
-    # Parse the response text as JSON
+def generate_menu(progress=None):
+    # progress(stage, **info) is called between stages; it may raise to cancel
+    progress = progress or (lambda stage, **info: None)
+
+    # Load menu dataset
+    if not os.path.exists(dataset_path):
+        raise FileNotFoundError(f"Dataset not found at {dataset_path}")
+
+    with stage("menu_data_load"):
+        df = load_dataset(dataset_path)
+        menu_items = df.to_dict(orient='records')
+    progress("data_loaded", rows=len(menu_items))
+
+    # Generate menu using Gemini
+    progress("llm_call_started")
+    # The JSON part between ```json and ``` markers is extracted and validated by the cache
     try:
-        menu_data = json.loads(response_text)
+        with stage("llm_response"):
+            menu, cached = llm_cache.generate_json(prompt)
+        progress("llm_response_ready", cached=cached)
+        return menu
     except json.JSONDecodeError:
         # If response is not valid JSON, create a default structure
-        menu_data = {
+        return {
             "month": input_data['target_month'],
             "year": input_data['target_year'],
             "menu": {
@@ -108,22 +109,27 @@ try:
                 "normal_dishes": []
             }
         }
-    
-    # Save to JSON file
-    with open(output_path, 'w') as f:
-        json.dump(menu_data, f, indent=4)
-    
-    # Print the final JSON response
-    print(json.dumps({
-        "status": "success",
-        "data": menu_data,
-        "file_path": output_path
-    }))
-    
-except Exception as e:
-    error_response = {
-        "status": "error",
-        "error": f"Error generating menu: {str(e)}"
-    }
-    print(json.dumps(error_response))
-    exit(1)
+
+if __name__ == "__main__":
+    try:
+        print(json.dumps({"status": "Generating menu..."}))  # Initial status
+        menu_data = generate_menu()
+        
+        # Save to JSON file
+        with open(output_path, 'w') as f:
+            json.dump(menu_data, f, indent=4)
+        
+        # Print the final JSON response
+        print(json.dumps({
+            "status": "success",
+            "data": menu_data,
+            "file_path": output_path
+        }))
+        
+    except Exception as e:
+        error_response = {
+            "status": "error",
+            "error": f"Error generating menu: {str(e)}"
+        }
+        print(json.dumps(error_response))
+        exit(1)